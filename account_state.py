@@ -0,0 +1,58 @@
+"""
+Account State Module
+Indexed account values and positions kept current from IB events
+"""
+
+class AccountState:
+    """Account values keyed by (account, tag, currency), positions by (account, symbol)"""
+
+    def __init__(self, ib):
+        self.ib = ib
+        self.account = None   # Default account for lookups (first managed account)
+        self.values = {}      # (account, tag, currency) -> value string
+        self.positions = {}   # (account, symbol) -> ib_insync Position
+        self.ib.accountValueEvent += self._on_account_value
+        self.ib.positionEvent += self._on_position
+
+    def load(self):
+        """Rebuild the indexes from ib_insync's current state (after connecting)"""
+        accounts = self.ib.managedAccounts()
+        self.account = accounts[0] if accounts else None
+        self.values = {}
+        self.positions = {}
+        for value in self.ib.accountValues():
+            self._on_account_value(value)
+        for position in self.ib.positions():
+            self._on_position(position)
+
+    def get_value(self, tag, currency='USD', account=None):
+        """
+        Get an account value as a float
+        Returns: float or None if the tag is not (yet) known
+        """
+        value = self.values.get((account or self.account, tag, currency))
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    def get_position(self, symbol, account=None):
+        """
+        Get the position for a symbol
+        Returns: ib_insync Position or None if flat
+        """
+        return self.positions.get((account or self.account, symbol))
+
+    def _on_account_value(self, value):
+        """Store an updated account value"""
+        if self.account is None:
+            self.account = value.account
+        self.values[(value.account, value.tag, value.currency)] = value.value
+
+    def _on_position(self, position):
+        """Store an updated position (dropping it once flat)"""
+        key = (position.account, position.contract.symbol)
+        if position.position == 0:
+            self.positions.pop(key, None)
+        else:
+            self.positions[key] = position
@@ -0,0 +1,124 @@
+"""
+Bar Store Module
+Keeps per-symbol intraday bars up to date and tracks the running low/high
+of day so LOD/HOD lookups need no network call
+"""
+import asyncio
+
+class IntradayBars:
+    """Streaming 1-minute bars for one symbol with running LOD/HOD"""
+
+    def __init__(self, symbol, bars):
+        self.symbol = symbol
+        self.bars = bars  # ib_insync BarDataList, kept up to date by TWS
+        self.lod = None
+        self.hod = None
+        for bar in bars:
+            self._include(bar)
+        self.bars.updateEvent += self._on_update
+
+    def _include(self, bar):
+        """Fold one bar into the running low/high"""
+        if bar.low > 0 and (self.lod is None or bar.low < self.lod):
+            self.lod = bar.low
+        if bar.high > 0 and (self.hod is None or bar.high > self.hod):
+            self.hod = bar.high
+
+    def _on_update(self, bars, has_new_bar):
+        """Update LOD/HOD from the bar TWS just changed (the last one)"""
+        if bars:
+            self._include(bars[-1])
+
+    def lod_hod(self):
+        """Returns: (lod, hod) or (None, None)"""
+        return self.lod, self.hod
+
+    def close(self):
+        """Stop listening for updates"""
+        self.bars.updateEvent -= self._on_update
+
+class BarStore:
+    """Intraday bar subscriptions keyed by symbol"""
+
+    def __init__(self, ib):
+        self.ib = ib
+        self.series = {}  # Symbol -> IntradayBars
+        self._loading = {}  # Symbol -> in-flight backfill task
+
+    def bind(self, ib):
+        """Move the store to another IB session (subscriptions need a restore())"""
+        if ib is self.ib:
+            return
+        if self.ib.isConnected():
+            # Leaving a live session: stop its bar streams rather than pay for two
+            for series in self.series.values():
+                self.ib.cancelHistoricalData(series.bars)
+        self.ib = ib
+
+    def get(self, symbol):
+        """Get the IntradayBars for a symbol, or None if not backfilled yet"""
+        return self.series.get(symbol)
+
+    async def ensure(self, symbol, contract):
+        """
+        Backfill today's 1-minute bars once and keep them streaming
+        Concurrent callers share one backfill, and a caller that is cancelled
+        (e.g. a superseded ticker refresh) leaves it running for the others
+        Returns: IntradayBars
+        """
+        series = self.series.get(symbol)
+        if series is not None:
+            return series
+        task = self._loading.get(symbol)
+        if task is None:
+            task = asyncio.ensure_future(self._backfill(symbol, contract))
+            self._loading[symbol] = task
+            task.add_done_callback(lambda t: self._loading.pop(symbol, None))
+        return await asyncio.shield(task)
+
+    async def _backfill(self, symbol, contract):
+        """Request today's bars with keepUpToDate and index them"""
+        bars = await self.ib.reqHistoricalDataAsync(
+            contract,
+            endDateTime='',
+            durationStr='1 D',
+            barSizeSetting='1 min',
+            whatToShow='TRADES',
+            useRTH=True,
+            formatDate=1,
+            keepUpToDate=True
+        )
+        # Another caller may have finished the same backfill while we waited
+        if symbol in self.series:
+            self.ib.cancelHistoricalData(bars)
+            return self.series[symbol]
+        series = IntradayBars(symbol, bars)
+        self.series[symbol] = series
+        return series
+
+    def drop(self, symbol):
+        """Cancel the streaming subscription for a symbol"""
+        series = self.series.pop(symbol, None)
+        if series is not None:
+            series.close()
+            try:
+                self.ib.cancelHistoricalData(series.bars)
+            except Exception as e:
+                print(f"Error cancelling bars for {symbol}: {e}")
+
+    async def restore(self):
+        """
+        Re-backfill every tracked symbol after a reconnect
+        (streaming bar subscriptions die with the old connection)
+        """
+        old_series = self.series
+        self.series = {}
+        for series in old_series.values():
+            series.close()
+        results = await asyncio.gather(
+            *(self.ensure(symbol, series.bars.contract) for symbol, series in old_series.items()),
+            return_exceptions=True
+        )
+        for symbol, result in zip(old_series, results):
+            if isinstance(result, Exception):
+                print(f"Error restoring bars for {symbol}: {result}")
@@ -0,0 +1,4 @@
+"""
+Benchmark Package
+Reproducible timings of the connector and Trading tab against the simulated gateway
+"""
@@ -0,0 +1,265 @@
+"""
+Benchmark Runner
+Times connector and Trading tab operations against the simulated gateway and
+saves the results as JSON baselines for run-over-run comparison
+
+Usage:
+    python -m bench.run                         # Run and print
+    python -m bench.run --save before           # Also write bench/baselines/before.json
+    python -m bench.run --compare before        # Print the change against a saved baseline
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contract_cache import ContractCache
+from ib_connector import IBConnector
+from latency import percentile
+from sim_gateway import SimulatedGateway
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+ORDER_TYPES = [
+    'Market + 3 Stops',
+    'Market + 3 Stops + OCO',
+    'Market + 1 Stop',
+    '3 Stops Only',
+    'Market Order',
+    'Limit Order',
+    'Stop Order'
+]
+
+class _QuietToast:
+    """Toast stand-in so GUI code can report without drawing notifications"""
+
+    def show(self, title, message, msg_type="info", duration=3000):
+        pass
+
+class BenchContext:
+    """Simulated gateway plus a connector connected to it"""
+
+    def __init__(self, args):
+        self.gateway = SimulatedGateway(
+            seed=args.seed,
+            quote_interval=None,  # Quotes only move when a case asks, so runs repeat exactly
+            connect_latency=args.latency,
+            contract_latency=args.latency,
+            history_latency=args.latency,
+            ack_latency=args.latency,
+            fill_latency=args.latency,
+            partial_fills=args.partial_fills
+        )
+        self.ib = IBConnector(fill_timeout=5, ib_factory=self.gateway.create_ib)
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self.ib.contract_cache = ContractCache(path=os.path.join(self._cache_dir.name, "contracts.json"))
+        if not self.ib.connect(7497):
+            raise RuntimeError("Could not connect to the simulated gateway")
+        self._symbol_seq = 0
+
+    def fresh_symbol(self):
+        """A symbol nothing has been cached or subscribed for yet"""
+        self._symbol_seq += 1
+        return f"SIM{self._symbol_seq:04d}"
+
+    def close(self):
+        self.ib.disconnect()
+        self.ib.loop_thread.stop()
+        self._cache_dir.cleanup()
+
+def _measure(ctx, func, iterations, warmup, alloc_iterations):
+    """
+    Time func over iterations, then count allocations over a shorter traced pass
+    Returns: result dict for the JSON baseline
+    """
+    for _ in range(warmup):
+        func()
+
+    calls_before = dict(ctx.gateway.api_calls)
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    calls = {api: count - calls_before.get(api, 0) for api, count in ctx.gateway.api_calls.items()}
+    calls = {api: count / iterations for api, count in calls.items() if count}
+
+    # tracemalloc traces every thread, so work done on the IB loop thread is included
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start_current, _ = tracemalloc.get_traced_memory()
+    start_blocks = len(tracemalloc.take_snapshot().traces)
+    for _ in range(alloc_iterations):
+        func()
+    end_current, peak = tracemalloc.get_traced_memory()
+    end_blocks = len(tracemalloc.take_snapshot().traces)
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "wall_ms": {
+            "mean": sum(timings) / len(timings),
+            "min": timings[0],
+            "p50": percentile(timings, 50),
+            "p95": percentile(timings, 95),
+            "max": timings[-1]
+        },
+        "api_calls_per_iter": calls,
+        "api_round_trips_per_iter": sum(calls.values()),
+        "alloc_peak_kib_per_iter": (peak - start_current) / 1024 / alloc_iterations,
+        "alloc_retained_kib_per_iter": (end_current - start_current) / 1024 / alloc_iterations,
+        "alloc_retained_blocks_per_iter": (end_blocks - start_blocks) / alloc_iterations
+    }
+
+def _market_data_cases(ctx):
+    """get_market_data / get_lod_hod, cold (new symbol) and warm (cached)"""
+    ctx.ib.get_market_data("AAPL")
+    ctx.ib.get_lod_hod("AAPL")
+    return {
+        "get_market_data.cold": lambda: ctx.ib.get_market_data(ctx.fresh_symbol()),
+        "get_market_data.warm": lambda: ctx.ib.get_market_data("AAPL"),
+        "get_lod_hod.cold": lambda: ctx.ib.get_lod_hod(ctx.fresh_symbol()),
+        "get_lod_hod.warm": lambda: ctx.ib.get_lod_hod("AAPL")
+    }
+
+def _order_cases(ctx):
+    """submit_order for every order type, BUY 100 AAPL with a stop 1% under the market"""
+    def submit(order_type):
+        price = ctx.gateway.price("AAPL")
+        stop_price = round(price * 0.99, 2)
+        entry_price = round(price * 0.995, 2)
+        success, message = ctx.ib.submit_order("AAPL", 100, stop_price, entry_price, "BUY", order_type)
+        if not success:
+            raise RuntimeError(f"{order_type}: {message}")
+
+    return {f"submit_order.{order_type}": (lambda order_type=order_type: submit(order_type))
+            for order_type in ORDER_TYPES}
+
+def _trading_tab_cases(ctx):
+    """TradingTab.refresh_account_info on a hidden Tk root (skipped without a display)"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f"Skipping Trading tab cases: {e}")
+        return {}
+    root.withdraw()
+
+    from tkinter import ttk
+    from gui.styles import configure_styles
+    from gui.trading_tab import TradingTab
+    configure_styles(ttk.Style(root))
+    config = {"risk_percent": "0.5", "watchlist": ["AAPL"]}
+    tab = TradingTab(root, config, lambda config: None, ctx.ib, _QuietToast())
+    tab.entry_ticker.delete(0, tk.END)
+    tab.entry_ticker.insert(0, "AAPL")
+    tab.entry_stop.delete(0, tk.END)
+    tab.entry_stop.insert(0, f"{ctx.gateway.price('AAPL') * 0.99:.2f}")
+
+    def refresh():
+        # The snapshot arrives through the Tk event loop, so pump it until the labels are applied
+        tab.refresh_account_info()
+        while tab.refresh_future is not None:
+            root.update()
+            time.sleep(0.001)
+        root.update()
+
+    return {"trading_tab.refresh_account_info": refresh}
+
+def run(args):
+    """
+    Run every case
+    Returns: baseline dict
+    """
+    ctx = BenchContext(args)
+    results = {}
+    try:
+        cases = {}
+        cases.update(_market_data_cases(ctx))
+        cases.update(_order_cases(ctx))
+        cases.update(_trading_tab_cases(ctx))
+        for name, func in cases.items():
+            if args.only and args.only not in name:
+                continue
+            print(f"Running {name}...")
+            results[name] = _measure(ctx, func, args.iterations, args.warmup, args.alloc_iterations)
+    finally:
+        ctx.close()
+
+    return {
+        "created_at": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "alloc_iterations": args.alloc_iterations,
+            "latency": args.latency,
+            "partial_fills": args.partial_fills,
+            "seed": args.seed
+        },
+        "results": results
+    }
+
+def print_results(baseline, previous=None):
+    """Print a results table, with % change against a previous baseline if given"""
+    header = f"{'case':<40} {'p50 ms':>9} {'p95 ms':>9} {'calls':>7} {'peak KiB':>9}"
+    if previous:
+        header += f" {'p50 chg':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, result in baseline["results"].items():
+        line = (f"{name:<40} {result['wall_ms']['p50']:>9.2f} {result['wall_ms']['p95']:>9.2f} "
+                f"{result['api_round_trips_per_iter']:>7.1f} {result['alloc_peak_kib_per_iter']:>9.1f}")
+        if previous:
+            old = previous["results"].get(name)
+            if old and old['wall_ms']['p50']:
+                change = (result['wall_ms']['p50'] - old['wall_ms']['p50']) / old['wall_ms']['p50'] * 100
+                line += f" {change:>+8.1f}%"
+            else:
+                line += f" {'new':>9}"
+        print(line)
+
+def baseline_path(name):
+    """Path of a named baseline (a name without a directory goes in bench/baselines/)"""
+    if os.path.dirname(name):
+        return name
+    return os.path.join(BASELINE_DIR, name if name.endswith('.json') else f"{name}.json")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the order panel against the simulated gateway")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed iterations per case")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed iterations before timing")
+    parser.add_argument("--alloc-iterations", type=int, default=10, help="Iterations traced for allocations")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated gateway latency per hop (seconds)")
+    parser.add_argument("--partial-fills", type=int, default=1, help="Executions per market order")
+    parser.add_argument("--seed", type=int, default=1, help="Simulated gateway random seed")
+    parser.add_argument("--only", help="Only run cases whose name contains this text")
+    parser.add_argument("--save", help="Save results as a named baseline")
+    parser.add_argument("--compare", help="Compare against a named baseline")
+    args = parser.parse_args()
+
+    previous = None
+    if args.compare:
+        with open(baseline_path(args.compare), 'r') as f:
+            previous = json.load(f)
+
+    baseline = run(args)
+    print_results(baseline, previous)
+
+    if args.save:
+        path = baseline_path(args.save)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Saved baseline to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,183 @@
 """
 Configuration Management Module
 Handles loading and saving of application settings
+
+Saves are write-behind: save_config() only hands a snapshot to a background
+writer, which coalesces bursts of changes and replaces the file atomically
+(temp file, fsync, rename), keeping the previous good file as a backup.
 """
+import copy
 import json
 import os
+import shutil
+import threading
+import time
 
 CONFIG_FILE = "tws_panel_config.json"
+BACKUP_SUFFIX = ".bak"
+WRITE_DELAY = 0.5    # Seconds to wait for further changes before writing
+SLOW_WRITE = 0.25    # Writes slower than this (seconds) are reported
+
+DEFAULT_CONFIG = {
+    "risk_percent": "1.0",
+    "port": "4001",
+    "hotkey_refresh": "F5",
+    "hotkey_place_order": "F9",
+    "watchlist": ["AAPL", "TSLA", "NVDA", "MSFT", "GOOGL", "AMZN", "META", "SPY", "QQQ", "IWM"],
+    "risk_buttons": [0.25, 0.5, 1.5]
+}
+
+def _read_json(path):
+    """Read a JSON config file (raises on missing or corrupt files)"""
+    with open(path, 'r') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError("top level is not an object")
+    return config
+
+class ConfigStore:
+    """Debounced, atomic write-behind persistence for the config file"""
+
+    def __init__(self, path=CONFIG_FILE, delay=WRITE_DELAY, slow_write=SLOW_WRITE):
+        self.path = path
+        self.backup_path = path + BACKUP_SUFFIX
+        self.delay = delay
+        self.slow_write = slow_write
+        self.writes = 0               # Files written so far
+        self.coalesced = 0            # Saves absorbed into a later write
+        self.last_write_seconds = None
+        self._pending = None          # Latest snapshot not yet written
+        self._due = None              # time.monotonic() when the pending snapshot is written
+        self._problems = []           # Messages for the GUI (slow/failed writes, recovered loads)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._writing = False
+
+    def load(self):
+        """
+        Load the config file, falling back to the last good backup
+        Returns: config dict (defaults if neither file is usable)
+        """
+        if not os.path.exists(self.path) and not os.path.exists(self.backup_path):
+            return copy.deepcopy(DEFAULT_CONFIG)
+        try:
+            return _read_json(self.path)
+        except Exception as e:
+            error = e
+        try:
+            config = _read_json(self.backup_path)
+            self._report(f"Config file unreadable ({error}); restored from {self.backup_path}")
+            return config
+        except Exception:
+            self._report(f"Config file unreadable ({error}); using defaults")
+            return copy.deepcopy(DEFAULT_CONFIG)
+
+    def save(self, config):
+        """Queue a snapshot of config for writing (returns immediately)"""
+        snapshot = copy.deepcopy(config)
+        with self._cond:
+            if self._pending is not None:
+                self.coalesced += 1
+            else:
+                self._due = time.monotonic() + self.delay
+            self._pending = snapshot
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="config-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self, timeout=5.0):
+        """
+        Write any pending snapshot now and wait for it (e.g. at exit)
+        Returns: True if nothing is left unwritten
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._pending is not None:
+                self._due = time.monotonic()
+                self._cond.notify()
+            while self._pending is not None or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def drain_problems(self):
+        """
+        Take the messages reported since the last call
+        Returns: list of str
+        """
+        with self._cond:
+            problems, self._problems = self._problems, []
+        return problems
+
+    def _report(self, message):
+        print(f"Config: {message}")
+        with self._cond:
+            self._problems.append(message)
+
+    def _run(self):
+        """Writer thread: wait until the pending snapshot is due, then write it"""
+        while True:
+            with self._cond:
+                while self._pending is None or time.monotonic() < self._due:
+                    timeout = None if self._pending is None else self._due - time.monotonic()
+                    self._cond.wait(timeout)
+                config, self._pending = self._pending, None
+                self._writing = True
+            try:
+                self._write(config)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _write(self, config):
+        """Replace the config file atomically, keeping the current good file as the backup"""
+        started = time.perf_counter()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(config, f)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                _read_json(self.path)
+                shutil.copyfile(self.path, self.backup_path)
+            except Exception:
+                pass  # Missing or corrupt: keep the older backup
+            os.replace(tmp_path, self.path)
+            if os.name == 'posix':
+                # Persist the rename itself
+                dir_fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+        except Exception as e:
+            self._report(f"Failed to save settings: {e}")
+            return
+        self.writes += 1
+        self.last_write_seconds = time.perf_counter() - started
+        if self.last_write_seconds > self.slow_write:
+            self._report(f"Saving settings took {self.last_write_seconds * 1000:.0f} ms")
+
+_store = ConfigStore()
 
 def load_config():
     """Load saved configuration"""
-    try:
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
-    except:
-        pass
-    return {
-        "risk_percent": "1.0", 
-        "port": "4001", 
-        "hotkey_refresh": "F5", 
-        "hotkey_place_order": "F9",
-        "watchlist": ["AAPL", "TSLA", "NVDA", "MSFT", "GOOGL", "AMZN", "META", "SPY", "QQQ", "IWM"],
-        "risk_buttons": [0.25, 0.5, 1.5]
-    }
+    return _store.load()
 
 def save_config(config):
-    """Save configuration to file"""
-    try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f)
-    except:
-        pass
+    """Save configuration to file (written in the background)"""
+    _store.save(config)
+
+def flush_config(timeout=5.0):
+    """Write any pending configuration change now (blocking)"""
+    return _store.flush(timeout)
 
+def drain_config_problems():
+    """Messages about slow or failed config writes and recovered loads since the last call"""
+    return _store.drain_problems()
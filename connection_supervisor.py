@@ -0,0 +1,142 @@
+"""
+Connection Supervisor Module
+Connects to IB in the background and reconnects with exponential backoff
+whenever TWS/IB Gateway goes away; a dropped data session is reopened on its
+own, without touching the order session
+"""
+import asyncio
+import time
+
+class ConnectionSupervisor:
+    """Background connection manager running on the IB loop thread"""
+
+    def __init__(self, ib_connector, port, initial_delay=1.0, max_delay=60.0):
+        self.ib = ib_connector
+        self.port = port
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.connected_callbacks = []  # Async callables run after every successful connect
+
+        # Status (read by the GUI)
+        self.state = "idle"             # idle / connecting / connected / waiting / stopped
+        self.attempts = 0               # Failed attempts since the last successful connect
+        self.next_retry_at = None       # time.time() of the next attempt while waiting
+        self.connect_count = 0          # Successful connects so far
+        self.last_connect_seconds = None  # Duration of the last successful connect
+        self.last_downtime = None       # Seconds from the last disconnect to reconnecting
+        self.disconnected_at = None
+
+        self._running = False
+        self._force = False
+        self._wake = None
+
+    def start(self):
+        """Start supervising (returns immediately)"""
+        self._running = True
+        for session in self.ib.sessions.values():
+            session.disconnectedEvent += self._on_disconnected
+        self.ib.run_async(self._run())
+
+    def stop(self):
+        """Stop supervising; no further reconnects are attempted"""
+        self._running = False
+        self.state = "stopped"
+        self.ib.loop_thread.call_soon(self._notify)
+
+    def reconnect(self, port=None):
+        """Force a reconnect, optionally to a new port (callable from any thread)"""
+        def request():
+            if port is not None:
+                self.port = port
+            self._force = True
+            self.attempts = 0
+            self._notify()
+        self.ib.loop_thread.call_soon(request)
+
+    def add_connected_callback(self, callback):
+        """Register an async callable to run after every successful connect"""
+        self.connected_callbacks.append(callback)
+
+    def _notify(self):
+        """Wake the supervisor loop (loop thread only)"""
+        if self._wake is not None:
+            self._wake.set()
+
+    def _on_disconnected(self):
+        """disconnectedEvent handler for any session"""
+        if self.state == "connected" and self.ib.is_connected():
+            print("IB data session lost, reopening it...")
+        elif self.state == "connected":
+            self.disconnected_at = time.time()
+            self.state = "waiting"
+            print("IB connection lost, reconnecting...")
+        self._notify()
+
+    async def _run(self):
+        """Supervisor loop: keep the connector connected until stopped"""
+        self._wake = asyncio.Event()
+        while self._running:
+            if self._force or not self.ib.is_connected():
+                self._force = False
+                await self._connect_with_backoff()
+            elif self.ib.dropped_sessions():
+                # Only a data session went away: orders keep their session (and their trades)
+                await self._reopen_with_backoff()
+            self._wake.clear()
+            if self._running and not self._force and self.ib.sessions_healthy():
+                await self._wake.wait()
+
+    async def _connect_with_backoff(self):
+        """Try to connect, doubling the wait after each failure"""
+        delay = self.initial_delay
+        while self._running:
+            self.state = "connecting"
+            self.next_retry_at = None
+            started = time.perf_counter()
+            if await self.ib.connect_async(self.port):
+                self.last_connect_seconds = time.perf_counter() - started
+                if self.disconnected_at is not None:
+                    self.last_downtime = time.time() - self.disconnected_at
+                    self.disconnected_at = None
+                self.attempts = 0
+                self.connect_count += 1
+                self.state = "connected"
+                await self._run_connected_callbacks()
+                return
+
+            if self.disconnected_at is None:
+                self.disconnected_at = time.time()
+            self.attempts += 1
+            self.state = "waiting"
+            self.next_retry_at = time.time() + delay
+            self._wake.clear()
+            try:
+                # A forced reconnect (e.g. new port) cuts the wait short
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._force = False
+            delay = min(delay * 2, self.max_delay)
+
+    async def _reopen_with_backoff(self):
+        """Reopen dropped data sessions one by one, doubling the wait after each failure"""
+        delay = self.initial_delay
+        while self._running and not self._force and self.ib.is_connected():
+            for name in self.ib.dropped_sessions():
+                await self.ib.reconnect_session_async(name, self.port)
+            if not self.ib.dropped_sessions():
+                return
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, self.max_delay)
+
+    async def _run_connected_callbacks(self):
+        """Run the post-connect callbacks, reporting (not raising) their errors"""
+        for callback in self.connected_callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                print(f"Error in post-connect callback: {e}")
@@ -0,0 +1,138 @@
+"""
+Contract Cache Module
+Keeps qualified contract details in memory and on disk so a symbol is only
+qualified with TWS once per TTL instead of on every refresh or order
+
+Lookups happen on the IB loop thread, which also sends orders, so saving only
+marks the cache dirty; a background writer coalesces the changes and replaces
+the file a moment later.
+"""
+import json
+import os
+import threading
+import time
+
+CONTRACT_CACHE_FILE = "tws_panel_contracts.json"
+CONTRACT_CACHE_TTL = 24 * 60 * 60  # One trading day, in seconds
+SAVE_DELAY = 1.0                   # Seconds to wait for further changes before writing
+
+class ContractCache:
+    """Qualified contract details keyed by symbol/exchange/currency"""
+
+    def __init__(self, path=CONTRACT_CACHE_FILE, ttl=CONTRACT_CACHE_TTL, save_delay=SAVE_DELAY):
+        self.path = path
+        self.ttl = ttl
+        self.save_delay = save_delay
+        self.entries = {}
+        self._dirty = False     # Changed since the last write
+        self._due = None        # time.monotonic() when the pending changes are written
+        self._writing = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self.load()
+
+    @staticmethod
+    def make_key(symbol, exchange='SMART', currency='USD'):
+        """Build the cache key for a contract (string so it survives JSON)"""
+        return f"{symbol.upper()}:{exchange}:{currency}"
+
+    def get(self, symbol, exchange='SMART', currency='USD'):
+        """
+        Get cached details for a contract
+        Returns: entry dict, or None if missing or older than the TTL
+        """
+        entry = self.entries.get(self.make_key(symbol, exchange, currency))
+        if entry is None:
+            return None
+        if time.time() - entry.get("qualified_at", 0) > self.ttl:
+            return None
+        return entry
+
+    def put(self, symbol, exchange, currency, con_id, primary_exchange, min_tick):
+        """Store qualified details for a contract and schedule a save"""
+        entry = {
+            "symbol": symbol.upper(),
+            "exchange": exchange,
+            "currency": currency,
+            "conId": con_id,
+            "primaryExchange": primary_exchange,
+            "minTick": min_tick,
+            "qualified_at": time.time()
+        }
+        self.entries[self.make_key(symbol, exchange, currency)] = entry
+        self.save()
+        return entry
+
+    def invalidate(self, symbol, exchange='SMART', currency='USD'):
+        """Drop a contract from the cache (e.g. after TWS no longer recognises the conId)"""
+        if self.entries.pop(self.make_key(symbol, exchange, currency), None) is not None:
+            self.save()
+
+    def load(self):
+        """Load cached entries from disk, dropping expired ones"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    entries = json.load(f)
+                now = time.time()
+                self.entries = {
+                    key: entry for key, entry in entries.items()
+                    if now - entry.get("qualified_at", 0) <= self.ttl
+                }
+        except Exception as e:
+            print(f"Warning: Could not load contract cache: {e}")
+            self.entries = {}
+
+    def save(self):
+        """Schedule a write of the cache to disk (returns immediately)"""
+        with self._cond:
+            if not self._dirty:
+                self._due = time.monotonic() + self.save_delay
+                self._dirty = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="contract-cache-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self, timeout=5.0):
+        """
+        Write any pending changes now and wait for them (e.g. at exit)
+        Returns: True if nothing is left unwritten
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._dirty:
+                self._due = time.monotonic()
+                self._cond.notify()
+            while self._dirty or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        """Writer thread: wait until pending changes are due, then write a snapshot"""
+        while True:
+            with self._cond:
+                while not self._dirty or time.monotonic() < self._due:
+                    self._cond.wait(self._due - time.monotonic() if self._dirty else None)
+                entries = dict(self.entries)
+                self._dirty = False
+                self._writing = True
+            try:
+                self._write(entries)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _write(self, entries):
+        """Replace the cache file atomically"""
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Warning: Could not save contract cache: {e}")
@@ -0,0 +1,49 @@
+"""
+Async Bridge Module
+Hands results of background futures back to the Tk thread
+"""
+import queue
+
+class FutureDispatcher:
+    """Runs callbacks on the Tk thread when concurrent futures complete"""
+
+    def __init__(self, widget, interval=15):
+        self.widget = widget
+        self.interval = interval  # Milliseconds between queue drains while work is pending
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._polling = False
+
+    def watch(self, future, callback):
+        """
+        Call callback(result, error) on the Tk thread once future is done
+        (not called if the future is cancelled). Must be called from the Tk thread
+        """
+        self._pending += 1
+        future.add_done_callback(lambda f: self._queue.put((callback, f)))
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.interval, self._drain)
+
+    def _drain(self):
+        """Deliver finished futures, then keep polling while any are outstanding"""
+        while True:
+            try:
+                callback, future = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if future.cancelled():
+                # Superseded work: nobody is waiting for the result
+                continue
+            try:
+                error = future.exception()
+                result = None if error else future.result()
+                callback(result, error)
+            except Exception as e:
+                print(f"Error in future callback: {e}")
+
+        if self._pending > 0:
+            self.widget.after(self.interval, self._drain)
+        else:
+            self._polling = False
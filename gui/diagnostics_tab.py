@@ -0,0 +1,190 @@
+"""
+Diagnostics Tab Module
+Shows order latency percentiles and histograms per order type
+"""
+import tkinter as tk
+from tkinter import ttk, filedialog
+from gui.styles import *
+from latency import STAGES
+
+ALL_ORDER_TYPES = "All order types"
+
+class DiagnosticsTab:
+    """Order latency diagnostics tab"""
+
+    def __init__(self, parent, config, save_config_func, ib_connector, toast):
+        self.parent = parent
+        self.config = config
+        self.save_config = save_config_func
+        self.ib = ib_connector
+        self.toast = toast
+        self.scheduler = None  # Set by the main window
+
+        # Create main frame
+        self.frame = tk.Frame(parent, bg=bg_color, padx=20, pady=15)
+
+        # Variables
+        self.order_type_var = tk.StringVar(value=ALL_ORDER_TYPES)
+        self.histogram_stage_var = tk.StringVar(value='place_order')
+
+        # Build the interface
+        self._build_interface()
+
+    def _build_interface(self):
+        """Build the diagnostics interface"""
+        # Filter row
+        filter_frame = tk.Frame(self.frame, bg=bg_color)
+        filter_frame.pack(fill='x', pady=(0, 10))
+
+        ttk.Label(filter_frame, text="Order Type:", font=FONT_MEDIUM).pack(side='left', padx=(0, 8))
+        self.order_type_combo = ttk.Combobox(
+            filter_frame,
+            textvariable=self.order_type_var,
+            state='readonly',
+            values=[ALL_ORDER_TYPES],
+            font=FONT_MEDIUM,
+            width=24
+        )
+        self.order_type_combo.pack(side='left')
+        self.order_type_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh())
+
+        # Percentile table (ms from hotkey / submit)
+        stats_frame = tk.LabelFrame(
+            self.frame,
+            text="Latency (ms from hotkey)",
+            bg=bg_color,
+            fg=accent_color,
+            font=("Segoe UI", 13, "bold"),
+            padx=10,
+            pady=10
+        )
+        stats_frame.pack(fill='x', pady=5)
+
+        self.stats_tree = ttk.Treeview(
+            stats_frame,
+            columns=('count', 'p50', 'p95', 'p99'),
+            height=len(STAGES),
+            style="Diagnostics.Treeview"
+        )
+        self.stats_tree.heading('#0', text='Stage')
+        self.stats_tree.column('#0', width=130)
+        for column in ('count', 'p50', 'p95', 'p99'):
+            self.stats_tree.heading(column, text=column)
+            self.stats_tree.column(column, width=70, anchor='e')
+        for stage in STAGES:
+            self.stats_tree.insert('', 'end', iid=stage, text=stage, values=('0', '-', '-', '-'))
+        self.stats_tree.pack(fill='x')
+
+        # Histogram of one stage
+        histogram_frame = tk.LabelFrame(
+            self.frame,
+            text="Histogram",
+            bg=bg_color,
+            fg=accent_color,
+            font=("Segoe UI", 13, "bold"),
+            padx=10,
+            pady=10
+        )
+        histogram_frame.pack(fill='x', pady=15)
+
+        stage_combo = ttk.Combobox(
+            histogram_frame,
+            textvariable=self.histogram_stage_var,
+            state='readonly',
+            values=list(STAGES),
+            font=FONT_SMALL,
+            width=16
+        )
+        stage_combo.pack(anchor='w', pady=(0, 5))
+        stage_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh())
+
+        self.histogram_canvas = tk.Canvas(histogram_frame, height=160, bg=entry_bg, highlightthickness=0)
+        self.histogram_canvas.pack(fill='x')
+
+        # Lateness of the window's periodic timers
+        self.jitter_label = ttk.Label(self.frame, text="", font=FONT_SMALL, justify='left')
+        self.jitter_label.pack(anchor='w', pady=(0, 5))
+
+        # Buttons
+        button_frame = tk.Frame(self.frame, bg=bg_color)
+        button_frame.pack(pady=5)
+        ttk.Button(button_frame, text="Refresh", command=self.refresh, style="Small.TButton").pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Export CSV", command=self._export_csv, style="Small.TButton").pack(side='left', padx=5)
+
+    def _selected_order_type(self):
+        """Order type filter, or None for all"""
+        order_type = self.order_type_var.get()
+        return None if order_type == ALL_ORDER_TYPES else order_type
+
+    def refresh(self):
+        """Redraw the percentile table and histogram from the latency buffer"""
+        self._update_jitter()
+        if self.ib is None:
+            return
+        latency = self.ib.latency
+        self.order_type_combo.config(values=[ALL_ORDER_TYPES] + latency.order_types())
+
+        order_type = self._selected_order_type()
+        for stage, (count, p50, p95, p99) in latency.summary(order_type).items():
+            self.stats_tree.item(stage, values=(
+                count,
+                f"{p50:.1f}" if p50 is not None else '-',
+                f"{p95:.1f}" if p95 is not None else '-',
+                f"{p99:.1f}" if p99 is not None else '-'
+            ))
+
+        samples = latency.stage_samples(order_type).get(self.histogram_stage_var.get(), [])
+        self._draw_histogram(samples)
+
+    def _update_jitter(self):
+        """Show how late each scheduled timer has run"""
+        if self.scheduler is None:
+            return
+        lines = [f"{name}: {runs} runs, late mean {mean:.1f} ms, max {worst:.1f} ms"
+                 for name, (runs, mean, worst, last) in sorted(self.scheduler.jitter().items()) if runs]
+        self.jitter_label.config(text="Timer jitter\n" + "\n".join(lines) if lines else "")
+
+    def _draw_histogram(self, values, bins=20):
+        """Draw a bar histogram of latency samples on the canvas"""
+        canvas = self.histogram_canvas
+        canvas.delete('all')
+        canvas.update_idletasks()
+        width = canvas.winfo_width() or 440
+        height = int(canvas['height'])
+
+        if not values:
+            canvas.create_text(width // 2, height // 2, text="No samples yet", fill=fg_color, font=FONT_SMALL)
+            return
+
+        low, high = min(values), max(values)
+        span = (high - low) or 1.0
+        counts = [0] * bins
+        for value in values:
+            counts[min(int((value - low) / span * bins), bins - 1)] += 1
+
+        bar_width = width / bins
+        max_count = max(counts)
+        for i, count in enumerate(counts):
+            bar_height = (height - 25) * count / max_count
+            x0 = i * bar_width + 1
+            canvas.create_rectangle(x0, height - 15 - bar_height, x0 + bar_width - 2, height - 15,
+                                    fill=button_color, outline='')
+        canvas.create_text(2, height - 2, text=f"{low:.1f} ms", anchor='sw', fill=fg_color, font=FONT_SMALL)
+        canvas.create_text(width - 2, height - 2, text=f"{high:.1f} ms", anchor='se', fill=fg_color, font=FONT_SMALL)
+        canvas.create_text(2, 2, text=f"n={len(values)}", anchor='nw', fill=accent_color, font=FONT_SMALL)
+
+    def _export_csv(self):
+        """Export the latency buffer to a CSV file"""
+        path = filedialog.asksaveasfilename(
+            parent=self.frame,
+            title="Export Order Latency",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if not path:
+            return
+        try:
+            self.ib.latency.export_csv(path)
+            self.toast.show("Success", f"Latency data exported to {path}", "success")
+        except Exception as e:
+            self.toast.show("Error", f"Failed to export latency data: {e}", "error")
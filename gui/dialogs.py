@@ -6,8 +6,8 @@ import tkinter as tk
 from tkinter import ttk
 from gui.styles import *
 
-def edit_watchlist_dialog(root, config, save_config, watchlist_buttons, switch_ticker_func, toast):
-    """Open modern dialog to edit watchlist"""
+def edit_watchlist_dialog(root, config, save_config, watchlist_buttons, switch_ticker_func, toast, on_save=None):
+    """Open modern dialog to edit watchlist (on_save is called with the new watchlist)"""
     current_watchlist = config.get("watchlist", ["AAPL", "TSLA", "NVDA", "MSFT", "GOOGL", "AMZN", "META", "SPY", "QQQ", "IWM"])
     
     # Create modern dialog window
@@ -93,6 +93,9 @@ def edit_watchlist_dialog(root, config, save_config, watchlist_buttons, switch_t
             )
             watchlist_buttons[i] = (btn, new_ticker)
         
+        if on_save:
+            on_save(new_watchlist)
+        
         toast.show("Success", "Watchlist updated successfully", "success")
         dialog.destroy()
     
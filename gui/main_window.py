@@ -2,13 +2,16 @@
 Main Window Module
 Contains the main application window with tabs
 """
+import time
 import tkinter as tk
 from tkinter import ttk
 from datetime import datetime
-import pytz
+from config import drain_config_problems
 from gui.styles import *
 from gui.trading_tab import TradingTab
 from gui.settings_tab import SettingsTab
+from gui.diagnostics_tab import DiagnosticsTab
+from gui.scheduler import TkScheduler
 
 class MainWindow:
     """Main application window"""
@@ -16,8 +19,11 @@ class MainWindow:
     def __init__(self, config, save_config_func, ib_connector, toast):
         self.config = config
         self.save_config = save_config_func
-        self.ib = ib_connector
+        self.ib = ib_connector  # None until attach_connector()
         self.toast = toast
+        self.supervisor = None  # Will be set by main application
+        self._seen_connect_count = 0
+        self._was_connected = False
         
         # Create main window
         self.root = tk.Tk()
@@ -26,6 +32,10 @@ class MainWindow:
         self.root.resizable(False, False)
         self.root.configure(bg=bg_color, padx=5, pady=5)
         
+        # All periodic and delayed window work runs from one timer wheel
+        self.scheduler = TkScheduler(self.root)
+        self._et_tz = None  # Loaded on the first clock update
+        
         # Configure styles
         self.style = ttk.Style(self.root)
         self.style.theme_use("clam")
@@ -43,6 +53,11 @@ class MainWindow:
         self.settings_tab = SettingsTab(self.notebook, config, save_config_func, ib_connector, toast)
         self.notebook.add(self.settings_tab.frame, text='Settings')
         
+        # Create diagnostics tab (refreshed whenever it is shown)
+        self.diagnostics_tab = DiagnosticsTab(self.notebook, config, save_config_func, ib_connector, toast)
+        self.notebook.add(self.diagnostics_tab.frame, text='Diagnostics')
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
+        
         # Configure combobox options
         configure_combobox_options(self.root)
         
@@ -55,10 +70,26 @@ class MainWindow:
         # Set up hotkeys
         self.settings_tab.set_bind_hotkeys_callback(self.bind_hotkeys)
         
-        # Schedule initial tasks
-        self.root.after(500, self.settings_tab.update_connection_status)
-        self.root.after(600, self.bind_hotkeys)
-        self.root.after(100, self.trading_tab.refresh_account_basic)
+        # Schedule initial and periodic tasks
+        self.scheduler.every('connection', 1000, self._watch_connection, first_ms=500)
+        self.scheduler.once('bind_hotkeys', 600, self.bind_hotkeys)
+        self.scheduler.every('config_problems', 1000, self._report_config_problems)
+        self.diagnostics_tab.scheduler = self.scheduler
+    
+    def attach_connector(self, ib_connector, supervisor, prefetcher):
+        """Hand the IB connector (loaded after the window is shown) to the window and tabs"""
+        self.ib = ib_connector
+        self.supervisor = supervisor
+        self.trading_tab.ib = ib_connector
+        self.trading_tab.prefetcher = prefetcher
+        self.settings_tab.ib = ib_connector
+        self.settings_tab.supervisor = supervisor
+        self.diagnostics_tab.ib = ib_connector
+    
+    def _on_tab_changed(self, event):
+        """Refresh the diagnostics view when its tab is selected"""
+        if self.notebook.select() == str(self.diagnostics_tab.frame):
+            self.diagnostics_tab.refresh()
     
     def _build_time_display(self):
         """Build ET time display in top-right corner"""
@@ -72,15 +103,46 @@ class MainWindow:
             pady=2
         )
         self.et_time_label.place(relx=1.0, x=-90, y=5, anchor="ne")
-        self._update_et_time()
+        # First update once the window is up (pytz is imported there, off the startup path),
+        # then on every wall-clock second
+        self.scheduler.once('clock_first', 0, self._update_et_time)
+        self.scheduler.every('clock', 1000, self._update_et_time, align=True)
     
     def _update_et_time(self):
         """Update the ET time display"""
-        et_tz = pytz.timezone('America/New_York')
-        et_time = datetime.now(et_tz)
+        if self._et_tz is None:
+            import pytz
+            self._et_tz = pytz.timezone('America/New_York')
+        et_time = datetime.now(self._et_tz)
         time_str = et_time.strftime("%H:%M:%S ET")
         self.et_time_label.config(text=time_str)
-        self.root.after(1000, self._update_et_time)
+    
+    def _watch_connection(self):
+        """Follow the background connection: refresh status and account data, notify on changes"""
+        connected = self.ib is not None and self.ib.is_connected()
+        supervisor = self.supervisor
+        if supervisor is not None and supervisor.connect_count != self._seen_connect_count:
+            first_connect = self._seen_connect_count == 0
+            self._seen_connect_count = supervisor.connect_count
+            self.trading_tab.refresh_account_basic()
+            self.trading_tab.schedule_staging()
+            if self.toast and connected:
+                if first_connect:
+                    self.toast.show("Connected", f"Connected to port {supervisor.port} in {supervisor.last_connect_seconds:.2f}s", "success", 3000)
+                else:
+                    outage = f" after {supervisor.last_downtime:.1f}s" if supervisor.last_downtime is not None else ""
+                    self.toast.show("Reconnected", f"Reconnected to port {supervisor.port}{outage}", "success", 3000)
+        elif self._was_connected and not connected and self.toast:
+            self.toast.show("Connection Lost", "Reconnecting to IB Gateway...", "warning")
+        self._was_connected = connected
+        
+        self.settings_tab.update_connection_status()
+    
+    def _report_config_problems(self):
+        """Show slow or failed background config writes"""
+        for message in drain_config_problems():
+            if self.toast:
+                self.toast.show("Settings", message, "warning", 5000)
     
     def _build_pin_button(self):
         """Build always-on-top pin button"""
@@ -148,7 +210,7 @@ class MainWindow:
                 place_order_key = f"<{place_order_key}>"
             
             def place_order_handler(e):
-                self.trading_tab.submit_order()
+                self.trading_tab.submit_order(key_time=time.perf_counter())
                 return "break"
             
             self.root.bind(place_order_key, place_order_handler)
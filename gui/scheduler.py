@@ -0,0 +1,154 @@
+"""
+Scheduler Module
+One timer wheel on the Tk loop for all periodic and delayed GUI work
+"""
+import math
+import time
+
+class _Task:
+    """A scheduled callback and its lateness history"""
+
+    def __init__(self, name, callback, interval, align):
+        self.name = name
+        self.callback = callback
+        self.interval = interval  # Seconds, or None for a one-off task
+        self.align = align        # Run on wall-clock multiples of the interval
+        self.due = None           # time.time() the task should run at
+        self.tick_time = None     # Start of the tick it was slotted into (due rounded up to the tick)
+        self.rounds = 0           # Full wheel turns left before it is due
+        self.cancelled = False
+        self.runs = 0
+        self.late_total = 0.0
+        self.late_max = 0.0
+        self.late_last = 0.0
+
+    def record_lateness(self, late):
+        self.runs += 1
+        self.late_last = late
+        self.late_total += late
+        self.late_max = max(self.late_max, late)
+
+class TkScheduler:
+    """
+    Hashed timer wheel driven by a single root.after chain
+    Ticks land on wall-clock multiples of tick_ms, every task due in a tick runs
+    in that tick, and each run records how late it was against its due time
+    """
+
+    def __init__(self, root, tick_ms=100, wheel_size=64):
+        self.root = root
+        self.tick = tick_ms / 1000
+        self.wheel = [[] for _ in range(wheel_size)]
+        self.tasks = {}        # Name -> _Task
+        self._current = None   # Absolute tick number last processed
+        self._job = None
+
+    def every(self, name, interval_ms, callback, align=False, first_ms=None):
+        """
+        Run callback every interval_ms (replaces any task with the same name)
+        align: run on wall-clock multiples of the interval (e.g. on the second)
+        first_ms: delay before the first run (default: one interval, or the next boundary)
+        """
+        task = _Task(name, callback, interval_ms / 1000, align)
+        self._add(task, first_ms)
+        return task
+
+    def once(self, name, delay_ms, callback):
+        """Run callback once after delay_ms (replaces any task with the same name)"""
+        task = _Task(name, callback, None, False)
+        self._add(task, delay_ms)
+        return task
+
+    def cancel(self, name):
+        """Stop a task"""
+        task = self.tasks.pop(name, None)
+        if task is not None:
+            task.cancelled = True
+
+    def jitter(self):
+        """
+        Lateness per task
+        Returns: dict of name -> (runs, mean ms, max ms, last ms)
+        """
+        return {name: (task.runs,
+                       task.late_total / task.runs * 1000 if task.runs else 0.0,
+                       task.late_max * 1000,
+                       task.late_last * 1000)
+                for name, task in self.tasks.items()}
+
+    def _add(self, task, first_ms):
+        self.cancel(task.name)
+        now = time.time()
+        if first_ms is not None:
+            task.due = now + first_ms / 1000
+        elif task.align:
+            task.due = (now // task.interval + 1) * task.interval
+        else:
+            task.due = now + task.interval
+        self.tasks[task.name] = task
+        start_wheel = self._job is None
+        if start_wheel:
+            self._current = int(now // self.tick)
+        self._insert(task)
+        if start_wheel:
+            self._schedule_tick()
+
+    def _insert(self, task):
+        """Put a task in the wheel slot for its due tick"""
+        # First tick at or after the due time (tolerating float error on exact boundaries)
+        due_tick = max(math.ceil(task.due / self.tick - 1e-6), self._current + 1)
+        ticks = due_tick - self._current
+        size = len(self.wheel)
+        task.rounds = (ticks - 1) // size
+        task.tick_time = due_tick * self.tick
+        self.wheel[due_tick % size].append(task)
+
+    def _schedule_tick(self):
+        """Sleep until the next tick boundary on the wall clock"""
+        delay = (self._current + 1) * self.tick - time.time()
+        self._job = self.root.after(max(1, int(delay * 1000 + 0.5)), self._on_tick)
+
+    def _on_tick(self):
+        """Run every task due in the ticks that have passed (catching up after a stall)"""
+        now_tick = int(time.time() / self.tick + 1e-6)
+        size = len(self.wheel)
+        while self._current < now_tick:
+            self._current += 1
+            slot = self.wheel[self._current % size]
+            if not slot:
+                continue
+            self.wheel[self._current % size] = []
+            for task in slot:
+                if task.cancelled:
+                    continue
+                if task.rounds > 0:
+                    task.rounds -= 1
+                    self.wheel[self._current % size].append(task)
+                    continue
+                self._run(task)
+
+        if self.tasks:
+            self._schedule_tick()
+        else:
+            self._job = None
+
+    def _run(self, task):
+        """Run one due task and reschedule it if periodic"""
+        started = time.time()
+        # Lateness beyond the tick granularity: time the Tk loop was busy elsewhere
+        task.record_lateness(max(0.0, started - task.tick_time))
+        try:
+            task.callback()
+        except Exception as e:
+            print(f"Error in scheduled task {task.name}: {e}")
+
+        if task.cancelled or self.tasks.get(task.name) is not task:
+            return
+        if task.interval is None:
+            del self.tasks[task.name]
+            return
+        # Next run stays on the original grid, skipping any runs missed during a stall
+        task.due += task.interval
+        if task.due <= started:
+            task.due += ((started - task.due) // task.interval + 1) * task.interval
+        self._insert(task)
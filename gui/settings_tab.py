@@ -2,6 +2,7 @@
 Settings Tab Module
 Contains the settings interface for connection and hotkeys
 """
+import time
 import tkinter as tk
 from tkinter import ttk
 from gui.styles import *
@@ -15,12 +16,14 @@ class SettingsTab:
         self.save_config = save_config_func
         self.ib = ib_connector
         self.toast = toast
+        self.supervisor = None  # Will be set by main application
         
         # Create main frame
         self.frame = tk.Frame(parent, bg=bg_color, padx=20, pady=15)
         
-        # Connection status label
+        # Connection status labels
         self.connection_status_label = None
+        self.connection_timing_label = None
         
         # Hotkey labels
         self.hotkey_refresh_label = None
@@ -43,7 +46,17 @@ class SettingsTab:
             background=bg_color,
             foreground=fg_color
         )
-        self.connection_status_label.pack(pady=(0, 15))
+        self.connection_status_label.pack(pady=(0, 2))
+        
+        # Connect/reconnect timing
+        self.connection_timing_label = ttk.Label(
+            self.frame,
+            text="",
+            font=FONT_SMALL,
+            background=bg_color,
+            foreground="#6c6c6c"
+        )
+        self.connection_timing_label.pack(pady=(0, 13))
         
         # Connection Settings Frame
         self._build_connection_settings()
@@ -223,28 +236,48 @@ class SettingsTab:
             self.config["port"] = port
             self.save_config(self.config)
             
-            # Reconnect
-            if self.ib.connect(int(port)):
-                self.toast.show("Success", f"Connected to port {port}", "success", 3000)
-                self.update_connection_status()
-            else:
-                self.toast.show("Error", f"Failed to connect to port {port}", "error")
-                self.update_connection_status()
+            # Reconnect in the background (the supervisor reports the outcome)
+            if self.supervisor is None:
+                return  # Still starting up: the saved port is used for the first connect
+            self.connection_status_label.config(text="Connection Status: Connecting...", foreground=fg_color)
+            self.supervisor.reconnect(int(port))
         except Exception as e:
             self.toast.show("Error", str(e), "error")
     
     def update_connection_status(self):
-        """Update the connection status display"""
-        if self.ib.is_connected():
+        """Update the connection status and timing display"""
+        supervisor = self.supervisor
+        connected = self.ib is not None and self.ib.is_connected()
+        if connected:
             self.connection_status_label.config(
                 text="Connection Status: ✓ Connected",
                 foreground="#A3BE8C"
             )
+        elif supervisor is not None and supervisor.state == "connecting":
+            self.connection_status_label.config(
+                text="Connection Status: Connecting...",
+                foreground="#EBCB8B"
+            )
         else:
             self.connection_status_label.config(
                 text="Connection Status: ✗ Disconnected",
                 foreground="#BF616A"
             )
+        
+        if supervisor is None:
+            return
+        if connected and supervisor.last_connect_seconds is not None:
+            timing = f"Connected in {supervisor.last_connect_seconds:.2f}s"
+            if supervisor.connect_count > 1:
+                timing += f" · Reconnects: {supervisor.connect_count - 1}"
+            if supervisor.last_downtime is not None:
+                timing += f" · Last outage: {supervisor.last_downtime:.1f}s"
+        elif supervisor.state == "waiting" and supervisor.next_retry_at is not None:
+            retry_in = max(0.0, supervisor.next_retry_at - time.time())
+            timing = f"Attempt {supervisor.attempts} failed · retrying in {retry_in:.0f}s"
+        else:
+            timing = ""
+        self.connection_timing_label.config(text=timing)
     
     def _capture_refresh_key(self):
         """Start capturing refresh hotkey"""
@@ -48,6 +48,18 @@ def configure_styles(style):
     style.configure("TradeInfo.TLabel", background=entry_bg, foreground="#A3BE8C", font=("Segoe UI", 10, "bold"))
     style.configure("TotalInfo.TLabel", background=entry_bg, foreground="#EBCB8B", font=("Segoe UI", 10, "bold"))
 
+    # Diagnostics table style
+    style.configure("Diagnostics.Treeview",
+                    background=entry_bg,
+                    fieldbackground=entry_bg,
+                    foreground=fg_color,
+                    font=FONT_SMALL,
+                    borderwidth=0)
+    style.configure("Diagnostics.Treeview.Heading",
+                    background=bg_color,
+                    foreground=accent_color,
+                    font=("Segoe UI", 9, "bold"))
+
     # Combobox Style
     style.configure("TCombobox",
                     fieldbackground=entry_bg,
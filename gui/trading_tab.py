@@ -2,9 +2,12 @@
 Trading Tab Module
 Contains the main trading interface
 """
+import time
 import tkinter as tk
 from tkinter import ttk
 from gui.styles import *
+from gui.async_bridge import FutureDispatcher
+from position_sizing import calculate_position_size
 
 class TradingTab:
     """Trading interface tab"""
@@ -19,6 +22,19 @@ class TradingTab:
         # Create main frame
         self.frame = tk.Frame(parent, bg=bg_color, padx=20, pady=15)
         
+        # Delivers IB futures back to the Tk thread
+        self.dispatcher = FutureDispatcher(self.frame)
+        self.order_in_flight = False
+        self.refresh_future = None  # Ticker snapshot request in flight
+        self.refresh_generation = 0  # Bumped per request; older results are stale
+        
+        # Warms watchlist symbols (set by main application)
+        self.prefetcher = None
+        
+        # Pre-built order group for the current form (transmitted as-is by the hotkey)
+        self.staged_order = None
+        self._staging_job = None
+        
         # Labels that will be updated
         self.label_net_liq = None
         self.label_cash = None
@@ -28,6 +44,7 @@ class TradingTab:
         self.label_position_value = None
         self.label_trade_position = None
         self.label_total_position = None
+        self.label_key_to_wire = None
         
         # Entry fields
         self.entry_ticker = None
@@ -119,6 +136,10 @@ class TradingTab:
         self.submit_btn = ttk.Button(button_frame_account, text="Place Order", command=self.submit_order)
         self.submit_btn.pack(side="left", padx=5)
         
+        # Time from hotkey/click to the order being handed to the socket
+        self.label_key_to_wire = ttk.Label(button_frame_account, text="", style="AccountInfo.TLabel")
+        self.label_key_to_wire.pack(side="left", padx=5)
+        
         # ========== Input Fields ==========
         self.entry_ticker = self._add_input("Ticker Symbol:", "AAPL", 2)
         self.entry_qty = self._add_input("Order Quantity:", "99", 3)
@@ -154,6 +175,12 @@ class TradingTab:
         order_type_combo.grid(row=8, column=1, sticky="ew", pady=10)
         
         root.grid_columnconfigure(1, weight=1)
+        
+        # Keep the staged order in step with the form
+        for entry in (self.entry_ticker, self.entry_qty, self.entry_entry, self.entry_stop):
+            entry.bind('<KeyRelease>', self.schedule_staging, add='+')
+        self.action_var.trace_add('write', self.schedule_staging)
+        self.order_type_var.trace_add('write', self.schedule_staging)
     
     def _add_input(self, label_text, default_val, row):
         """Helper to add input field"""
@@ -310,6 +337,7 @@ class TradingTab:
                 command=lambda t=ticker: self._switch_ticker(t) if t else None
             )
             btn.grid(row=row, column=col, padx=2, pady=2)
+            btn.bind('<Enter>', lambda e, index=i: self._on_watchlist_hover(index))
             self.watchlist_buttons.append((btn, ticker))
     
     def _switch_ticker(self, ticker_symbol):
@@ -351,7 +379,29 @@ class TradingTab:
         """Open dialog to edit watchlist"""
         from gui.dialogs import edit_watchlist_dialog
         edit_watchlist_dialog(self.frame.master.master, self.config, self.save_config, 
-                            self.watchlist_buttons, self._switch_ticker, self.toast)
+                            self.watchlist_buttons, self._switch_ticker, self.toast,
+                            on_save=self._on_watchlist_saved)
+    
+    def _on_watchlist_hover(self, index):
+        """Move a watchlist symbol to the front of the prefetch queue"""
+        ticker = self.watchlist_buttons[index][1]
+        if ticker and self.prefetcher is not None:
+            self.prefetcher.boost(ticker)
+    
+    def _on_watchlist_saved(self, watchlist):
+        """Keep quote subscriptions in line with the edited watchlist and warm the new symbols"""
+        if self.ib is None:
+            return  # Still starting up: the saved watchlist is subscribed on connect
+        if self.prefetcher is not None:
+            future = self.ib.run_async(self.prefetcher.prefetch_async(watchlist))
+        else:
+            future = self.ib.run_async(self.ib.set_watchlist_async(watchlist))
+        self.dispatcher.watch(future, self._on_watchlist_subscribed)
+    
+    def _on_watchlist_subscribed(self, result, error):
+        """Report watchlist subscription errors"""
+        if error:
+            print(f"Error updating watchlist subscriptions: {error}")
     
     def _edit_risk_buttons(self):
         """Open dialog to edit risk buttons"""
@@ -362,89 +412,93 @@ class TradingTab:
     def refresh_account_basic(self):
         """Quick refresh of basic account info (no blocking)"""
         try:
-            if not self.ib.is_connected():
+            if self.ib is None or not self.ib.is_connected():
                 return
-            account_values = self.ib.get_account_values()
-            
-            net_liquidation = "N/A"
-            cash_balance = "N/A"
-            buying_power = "N/A"
-            
-            for value in account_values:
-                if value.tag == 'NetLiquidation' and value.currency == 'USD':
-                    net_liquidation = f"${float(value.value):,.2f}"
-                elif value.tag == 'CashBalance' and value.currency == 'USD':
-                    cash_balance = f"${float(value.value):,.2f}"
-                elif value.tag == 'BuyingPower' and value.currency == 'USD':
-                    buying_power = f"${float(value.value):,.2f}"
-            
-            self.label_net_liq.config(text=f"Net Liquidation: {net_liquidation}")
-            self.label_cash.config(text=f"Cash Balance: {cash_balance}")
-            self.label_buying_power.config(text=f"Buying Power: {buying_power}")
+            self._update_account_labels()
         except:
             pass
     
+    def _update_account_labels(self):
+        """
+        Update the account value labels from the connector's account index
+        Returns: net liquidation value (0.0 if unknown)
+        """
+        net_liq_value = self.ib.get_account_value('NetLiquidation')
+        cash_value = self.ib.get_account_value('CashBalance')
+        buying_power_value = self.ib.get_account_value('BuyingPower')
+        
+        net_liquidation = f"${net_liq_value:,.2f}" if net_liq_value is not None else "N/A"
+        cash_balance = f"${cash_value:,.2f}" if cash_value is not None else "N/A"
+        buying_power = f"${buying_power_value:,.2f}" if buying_power_value is not None else "N/A"
+        
+        self.label_net_liq.config(text=f"Net Liquidation: {net_liquidation}")
+        self.label_cash.config(text=f"Cash Balance: {cash_balance}")
+        self.label_buying_power.config(text=f"Buying Power: {buying_power}")
+        return net_liq_value or 0.0
+    
     def refresh_account_info(self):
-        """Full refresh of account and position info"""
+        """Full refresh of account and position info (ticker data arrives asynchronously)"""
         try:
-            if not self.ib.is_connected():
+            if self.ib is None or not self.ib.is_connected():
                 self.toast.show("Not Connected", "Please connect to IB Gateway first.", "warning")
                 return
             
-            account_values = self.ib.get_account_values()
-            
-            net_liquidation = "N/A"
-            net_liq_value = 0.0
-            cash_balance = "N/A"
-            buying_power = "N/A"
-            
-            for value in account_values:
-                if value.tag == 'NetLiquidation' and value.currency == 'USD':
-                    net_liq_value = float(value.value)
-                    net_liquidation = f"${net_liq_value:,.2f}"
-                elif value.tag == 'CashBalance' and value.currency == 'USD':
-                    cash_balance = f"${float(value.value):,.2f}"
-                elif value.tag == 'BuyingPower' and value.currency == 'USD':
-                    buying_power = f"${float(value.value):,.2f}"
-            
-            self.label_net_liq.config(text=f"Net Liquidation: {net_liquidation}")
-            self.label_cash.config(text=f"Cash Balance: {cash_balance}")
-            self.label_buying_power.config(text=f"Buying Power: {buying_power}")
+            self._update_account_labels()
             
             # Get position info for the ticker
             ticker = self.entry_ticker.get().strip().upper()
             if ticker:
-                self._refresh_ticker_info(ticker, net_liq_value)
+                self._refresh_ticker_info(ticker)
             else:
                 self._clear_ticker_info()
                 
         except Exception as e:
             self.toast.show("Error", f"Failed to retrieve account info: {str(e)}", "error")
     
-    def _refresh_ticker_info(self, ticker, net_liq_value):
-        """Refresh ticker-specific information"""
+    def _refresh_ticker_info(self, ticker):
+        """Request price, position and LOD/HOD for a ticker on the IB loop thread"""
+        # Shown on the next paint; the Tk loop keeps running while the quote loads
+        self.label_current_price.config(text=f"Current Price ({ticker}): Loading...")
+        
+        # A newer request supersedes the one in flight: stop waiting on its quote/bars
+        # (shared contract and bar backfills keep running and warm the caches)
+        if self.refresh_future is not None:
+            self.refresh_future.cancel()
+        self.refresh_generation += 1
+        generation = self.refresh_generation
+        
+        use_lod_hod = self.use_lod_var.get() or self.use_hod_var.get()
+        self.refresh_future = self.ib.run_async(
+            self.ib.get_ticker_snapshot_async(ticker, include_lod_hod=use_lod_hod)
+        )
+        self.dispatcher.watch(
+            self.refresh_future,
+            lambda snapshot, error: self._on_ticker_info(generation, ticker, use_lod_hod, snapshot, error)
+        )
+    
+    def _on_ticker_info(self, generation, ticker, use_lod_hod, snapshot, error):
+        """Apply a ticker snapshot to the labels and order form (called on the Tk thread)"""
+        # Results for anything but the latest request, or a ticker no longer in the form, are dropped
+        if generation != self.refresh_generation:
+            return
+        self.refresh_future = None
+        if ticker != self.entry_ticker.get().strip().upper():
+            return
+        if error:
+            print(f"Error getting position info for {ticker}: {error}")
+            self._clear_ticker_info(ticker)
+            return
         try:
-            # Show loading status
-            self.label_current_price.config(text=f"Current Price ({ticker}): Loading...")
-            self.frame.update()
-            
-            # Get current price
-            current_price = self.ib.get_market_data(ticker)
-            
-            # Get position
-            positions = self.ib.get_positions()
-            position_qty = 0
+            net_liq_value = self.ib.get_account_value('NetLiquidation') or 0.0
+            current_price = snapshot['price']
+            position_qty = snapshot['position']
             position_value = 0.0
             position_pct = 0.0
             
-            for pos in positions:
-                if pos.contract.symbol == ticker:
-                    position_qty = pos.position
-                    if current_price:
-                        position_value = abs(position_qty * current_price)
-                        if net_liq_value > 0:
-                            position_pct = (position_value / net_liq_value) * 100
-                    break
+            if position_qty and current_price:
+                position_value = abs(position_qty * current_price)
+                if net_liq_value > 0:
+                    position_pct = (position_value / net_liq_value) * 100
             
             # Update current price label
             if current_price:
@@ -463,8 +517,8 @@ class TradingTab:
                 self.label_position_value.config(text=f"Current Value: $0.00")
             
             # Auto-update LOD/HOD if selected
-            if self.use_lod_var.get() or self.use_hod_var.get():
-                lod, hod = self.ib.get_lod_hod(ticker)
+            if use_lod_hod:
+                lod, hod = snapshot['lod'], snapshot['hod']
                 if self.use_lod_var.get() and lod:
                     self.entry_stop.delete(0, tk.END)
                     self.entry_stop.insert(0, f"{lod:.2f}")
@@ -475,6 +529,9 @@ class TradingTab:
             # Auto-calculate quantity based on risk %
             if current_price:
                 self._calculate_position_size(current_price, net_liq_value, position_qty)
+            
+            # Qty/stop may have changed programmatically
+            self.schedule_staging()
                 
         except Exception as e:
             import traceback
@@ -485,52 +542,29 @@ class TradingTab:
     def _calculate_position_size(self, current_price, net_liq_value, position_qty):
         """Calculate position size based on risk percentage"""
         try:
-            risk_pct = float(self.entry_risk.get())
-            stop_price = float(self.entry_stop.get())
-            action = self.action_var.get()
+            sizing = calculate_position_size(
+                current_price, float(self.entry_stop.get()), net_liq_value,
+                float(self.entry_risk.get()), self.action_var.get(), position_qty
+            )
             
-            if 0 < risk_pct <= 100 and net_liq_value > 0:
-                # Calculate risk per share
-                if action == 'BUY':
-                    risk_per_share = current_price - stop_price
-                else:  # SELL
-                    risk_per_share = stop_price - current_price
+            if sizing is None:
+                self.label_trade_position.config(text=f"Trade Position %: N/A (Invalid parameters)")
+                self.label_total_position.config(text=f"Total After Trade: N/A")
+            elif sizing['quantity'] > 0:
+                # Update the quantity field
+                self.entry_qty.delete(0, tk.END)
+                self.entry_qty.insert(0, str(sizing['quantity']))
                 
-                if risk_per_share > 0:
-                    # Calculate quantity
-                    risk_amount = net_liq_value * (risk_pct / 100)
-                    quantity = int(risk_amount / risk_per_share)
-                    
-                    if quantity > 0:
-                        # Update the quantity field
-                        self.entry_qty.delete(0, tk.END)
-                        self.entry_qty.insert(0, str(quantity))
-                        
-                        # Calculate and display trade position percentage
-                        trade_value = quantity * current_price
-                        trade_pct = (trade_value / net_liq_value) * 100
-                        self.label_trade_position.config(
-                            text=f"Trade Position %: {trade_pct:.2f}% (${trade_value:,.2f})"
-                        )
-                        
-                        # Calculate total position after trade
-                        if action == 'BUY':
-                            total_qty = position_qty + quantity
-                        else:  # SELL
-                            total_qty = position_qty - quantity
-                        
-                        total_value = abs(total_qty) * current_price
-                        total_pct = (total_value / net_liq_value) * 100 if net_liq_value > 0 else 0
-                        
-                        self.label_total_position.config(
-                            text=f"Total After Trade: {total_pct:.2f}% (${total_value:,.2f})"
-                        )
-                    else:
-                        self.label_trade_position.config(text=f"Trade Position %: N/A")
-                        self.label_total_position.config(text=f"Total After Trade: N/A")
-                else:
-                    self.label_trade_position.config(text=f"Trade Position %: N/A (Invalid parameters)")
-                    self.label_total_position.config(text=f"Total After Trade: N/A")
+                # Display trade position and total position after trade
+                self.label_trade_position.config(
+                    text=f"Trade Position %: {sizing['trade_pct']:.2f}% (${sizing['trade_value']:,.2f})"
+                )
+                self.label_total_position.config(
+                    text=f"Total After Trade: {sizing['total_pct']:.2f}% (${sizing['total_value']:,.2f})"
+                )
+            else:
+                self.label_trade_position.config(text=f"Trade Position %: N/A")
+                self.label_total_position.config(text=f"Total After Trade: N/A")
         except:
             self.label_trade_position.config(text=f"Trade Position %: N/A")
             self.label_total_position.config(text=f"Total After Trade: N/A")
@@ -544,36 +578,108 @@ class TradingTab:
         self.label_trade_position.config(text=f"Trade Position %: N/A")
         self.label_total_position.config(text=f"Total After Trade: N/A")
     
-    def submit_order(self):
-        """Submit order to IB"""
+    def _read_order_form(self):
+        """
+        Read the order form
+        Returns: (ticker, qty, stop_price, entry_price, action, order_type); raises ValueError if invalid
+        """
+        return (
+            self.entry_ticker.get().strip().upper(),
+            int(self.entry_qty.get()),
+            float(self.entry_stop.get()),
+            float(self.entry_entry.get()),
+            self.action_var.get(),
+            self.order_type_var.get()
+        )
+    
+    def schedule_staging(self, *args):
+        """Re-stage the order shortly after the form stops changing"""
+        if self._staging_job is not None:
+            self.frame.after_cancel(self._staging_job)
+        self._staging_job = self.frame.after(150, self._stage_order)
+    
+    def _stage_order(self):
+        """Pre-build the order group for the current form on the IB loop thread"""
+        self._staging_job = None
+        if self.ib is None or not self.ib.is_connected():
+            return
         try:
-            if not self.ib.is_connected():
+            form = self._read_order_form()
+        except ValueError:
+            self.staged_order = None
+            return
+        if not form[0] or form[1] <= 0:
+            self.staged_order = None
+            return
+        if self.staged_order is not None and self.staged_order.matches(*form):
+            return
+        
+        future = self.ib.run_async(self.ib.stage_order_async(*form))
+        self.dispatcher.watch(future, self._on_order_staged)
+    
+    def _on_order_staged(self, staged, error):
+        """Keep a freshly staged order if the form still matches it"""
+        if error:
+            print(f"Error staging order: {error}")
+            return
+        try:
+            form = self._read_order_form()
+        except ValueError:
+            return
+        if staged.matches(*form):
+            self.staged_order = staged
+    
+    def submit_order(self, key_time=None):
+        """
+        Submit order to IB (runs on the IB loop thread; the UI stays live while it fills)
+        key_time: perf_counter() when the hotkey was pressed
+        """
+        entry_time = time.perf_counter()
+        if self.order_in_flight:
+            return
+        try:
+            if self.ib is None or not self.ib.is_connected():
                 self.toast.show("Not Connected", "Please connect to IB Gateway first.", "error")
                 return
             
+            form = self._read_order_form()
+            
             # Disable button and show placing order status
+            self.order_in_flight = True
             self.submit_btn.config(state='disabled', text='Placing Order...')
-            self.frame.update()
-            
-            ticker = self.entry_ticker.get().strip().upper()
-            qty = int(self.entry_qty.get())
-            stop_price = float(self.entry_stop.get())
-            entry_price = float(self.entry_entry.get())
-            action = self.action_var.get()
-            order_type = self.order_type_var.get()
-            
-            success, message = self.ib.submit_order(ticker, qty, stop_price, entry_price, action, order_type)
             
-            if success:
-                self.toast.show("Success", message, "success", 5000)
-            else:
-                self.toast.show("Order Error", message, "error")
-                
+            # The staged group's reserved IDs are used up by this submission
+            staged, self.staged_order = self.staged_order, None
+            timeline = self.ib.latency.start(form[5], form[0], hotkey_time=key_time, entry_time=entry_time)
+            future = self.ib.run_async(
+                self.ib.submit_order_async(*form, staged=staged, timeline=timeline)
+            )
+            self.dispatcher.watch(future, self._on_order_submitted)
         except Exception as e:
             self.toast.show("Error", str(e), "error")
-        finally:
-            # Restore button state
-            self.submit_btn.config(state='normal', text='Place Order')
+            self._restore_submit_button()
+    
+    def _on_order_submitted(self, result, error):
+        """Report the outcome of submit_order (called on the Tk thread)"""
+        self._restore_submit_button()
+        self.schedule_staging()
+        if error:
+            self.toast.show("Error", str(error), "error")
+            return
+        
+        if self.ib.last_key_to_wire is not None:
+            self.label_key_to_wire.config(text=f"Key→wire: {self.ib.last_key_to_wire * 1000:.1f} ms")
+        
+        success, message = result
+        if success:
+            self.toast.show("Success", message, "success", 5000)
+        else:
+            self.toast.show("Order Error", message, "error")
+    
+    def _restore_submit_button(self):
+        """Re-enable the Place Order button"""
+        self.order_in_flight = False
+        self.submit_btn.config(state='normal', text='Place Order')
 
 
 
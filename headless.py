@@ -0,0 +1,347 @@
+"""
+Headless Module
+Order entry without Tk: a one-shot or batch CLI and a local Unix-socket JSON
+API, both driving one IBConnector
+
+Usage:
+    python -m headless submit AAPL --stop 187.50 [--qty 300 | --risk 0.5] [--action SELL] [--type "Market + 1 Stop"]
+    python -m headless submit --batch orders.jsonl   (one JSON order per line, "-" for stdin)
+    python -m headless serve [--socket /tmp/ib_order_panel.sock]
+    (add --simulate to run against the simulated gateway)
+
+An order is a JSON object with "ticker", "stop" and either "qty" or "risk"
+(percent of net liquidation lost if stopped out), plus optional "action",
+"type" and "entry" (limit price; defaults to the live price). The API reads
+one JSON request per line and answers each with one JSON line, echoing "id":
+    {"cmd": "submit", ...order}   {"cmd": "size", ...order}
+    {"cmd": "quote", "ticker": ...}   {"cmd": "account"}   {"cmd": "ping"}
+Requests on one connection run concurrently, so answers may come back out of order.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+from config import load_config
+from ib_connector import connector_from_config, ORDER_TYPES
+from position_sizing import calculate_position_size
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "ib_order_panel.sock")
+MAX_REQUEST = 64 * 1024
+
+class HeadlessTrader:
+    """Turns JSON order requests into IBConnector calls (IB loop thread)"""
+
+    def __init__(self, ib_connector, risk_percent=None, order_type="Market + 3 Stops", ack_timeout=5):
+        self.ib = ib_connector
+        self.risk_percent = risk_percent  # Default risk % for orders without a qty
+        self.order_type = order_type      # Default order type
+        self.ack_timeout = ack_timeout    # Seconds to wait for TWS to acknowledge an order
+        self.commands = {
+            "submit": self.submit_async,
+            "size": self.size_async,
+            "quote": self.quote_async,
+            "account": self.account_async,
+            "ping": self.ping_async
+        }
+
+    async def handle_async(self, request):
+        """
+        Run one request
+        Returns: response dict with "ok" (and "error" when it failed)
+        """
+        response = {}
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            if "id" in request:
+                response["id"] = request["id"]
+            command = self.commands.get(request.get("cmd", "submit"))
+            if command is None:
+                raise ValueError(f"Unknown command: {request.get('cmd')}")
+            response.update(await command(request))
+            response["ok"] = True
+        except (ValueError, KeyError, TypeError) as e:
+            response.update(ok=False, error=f"Invalid request: {e}")
+        except Exception as e:
+            response.update(ok=False, error=str(e))
+        return response
+
+    async def ping_async(self, request):
+        return {"connected": self.ib.is_connected()}
+
+    async def quote_async(self, request):
+        """Live price for a ticker"""
+        ticker = self._ticker(request)
+        self._require_connection()
+        async with self._pinned_quote(ticker) as price:
+            quote = self.ib.get_quote(ticker)
+            return {"ticker": ticker, "price": price, "bid": quote.bid, "ask": quote.ask}
+
+    async def account_async(self, request):
+        """Key account values"""
+        self._require_connection()
+        state = self.ib.account_state
+        return {
+            "account": state.account,
+            "net_liquidation": state.get_value('NetLiquidation'),
+            "buying_power": state.get_value('BuyingPower'),
+            "cash": state.get_value('CashBalance')
+        }
+
+    async def size_async(self, request):
+        """Risk-based size for an order, without sending it"""
+        order = self._parse(request)
+        async with self._pinned_quote(order["ticker"], self._needs_price(order)) as price:
+            return self._complete(order, price)
+
+    async def submit_async(self, request):
+        """Size (if needed) and send an order; answers once TWS acknowledges the entry"""
+        order = self._parse(request)
+        # The quote stays pinned until the group is placed: staging anchors the exits to it
+        async with self._pinned_quote(order["ticker"], self._needs_price(order)) as price:
+            order = self._complete(order, price)
+            timeline = self.ib.latency.start(order["type"], order["ticker"])
+            result = await self.ib.place_order_async(
+                order["ticker"], order["qty"], order["stop"], order["entry"], order["action"], order["type"],
+                timeline=timeline, ack_timeout=self.ack_timeout
+            )
+        result.update(ticker=order["ticker"], action=order["action"], type=order["type"], qty=order["qty"])
+        return result
+
+    @contextlib.asynccontextmanager
+    async def _pinned_quote(self, ticker, needed=True):
+        """
+        Stream a ticker for the length of a request without taking the active slot,
+        so concurrent requests for other symbols keep their quotes
+        Yields: live price (raises LookupError if none arrives), or None if not needed
+        """
+        if not needed:
+            yield None
+            return
+        price = await self.ib.pin_quote_async(ticker)
+        try:
+            if price is None:
+                raise LookupError(f"No market data for {ticker}")
+            yield price
+        finally:
+            self.ib.unpin_quote(ticker)
+
+    def _parse(self, request):
+        """
+        Validate an order request
+        Returns: dict with ticker, action, type, stop, entry (or None), qty (or None) and risk
+        """
+        ticker = self._ticker(request)
+        action = str(request.get("action", "BUY")).upper()
+        if action not in ('BUY', 'SELL'):
+            raise ValueError("action must be BUY or SELL")
+        order_type = request.get("type", self.order_type)
+        if order_type not in ORDER_TYPES:
+            raise ValueError(f"type must be one of: {', '.join(ORDER_TYPES)}")
+        entry_price = float(request["entry"]) if request.get("entry") is not None else None
+        if order_type == 'Limit Order' and entry_price is None:
+            raise ValueError("entry is required for limit orders")
+        qty = int(request["qty"]) if request.get("qty") is not None else None
+        risk_pct = request.get("risk", self.risk_percent)
+        if qty is None and risk_pct is None:
+            raise ValueError("qty or risk is required")
+        self._require_connection()
+        return {"ticker": ticker, "action": action, "type": order_type, "stop": float(request["stop"]),
+                "entry": entry_price, "qty": qty, "risk": risk_pct}
+
+    def _needs_price(self, order):
+        """The live price anchors market entries and risk sizing (limit orders size off their limit)"""
+        return order["entry"] is None or (order["qty"] is None and order["type"] != 'Limit Order')
+
+    def _complete(self, order, price):
+        """
+        Fill in the entry price and risk-based quantity
+        Returns: dict with ticker, action, type, stop, entry, qty and sizing_price
+        """
+        entry_price = order["entry"] if order["entry"] is not None else price
+        sizing_price = entry_price if order["type"] == 'Limit Order' else (price or entry_price)
+        # A stop on the wrong side would trigger as soon as the entry fills (a plain stop order is the entry)
+        if order["type"] != 'Stop Order':
+            if order["action"] == 'BUY' and order["stop"] >= sizing_price:
+                raise ValueError(f"Stop ${order['stop']:.2f} must be below the price ${sizing_price:.2f}")
+            if order["action"] == 'SELL' and order["stop"] <= sizing_price:
+                raise ValueError(f"Stop ${order['stop']:.2f} must be above the price ${sizing_price:.2f}")
+        qty = order["qty"]
+        if qty is None:
+            sizing = calculate_position_size(
+                sizing_price, order["stop"], self.ib.account_state.get_value('NetLiquidation') or 0.0,
+                float(order["risk"]), order["action"], self.ib.get_position_qty(order["ticker"])
+            )
+            if sizing is None:
+                raise ValueError("Cannot size the order (check risk %, stop side and net liquidation)")
+            qty = sizing['quantity']
+        if qty <= 0:
+            raise ValueError("Quantity must be positive")
+        return {"ticker": order["ticker"], "action": order["action"], "type": order["type"],
+                "stop": order["stop"], "entry": entry_price, "qty": qty, "sizing_price": sizing_price}
+
+    def _ticker(self, request):
+        ticker = str(request["ticker"]).strip().upper()
+        if not ticker:
+            raise ValueError("ticker is required")
+        return ticker
+
+    def _require_connection(self):
+        if not self.ib.is_connected():
+            raise ConnectionError("Not connected to IB Gateway")
+
+class SocketAPI:
+    """Newline-delimited JSON over a Unix socket, many requests per connection"""
+
+    def __init__(self, trader, path=DEFAULT_SOCKET):
+        self.trader = trader
+        self.path = path
+        self.server = None
+
+    async def serve_forever(self):
+        """Listen (owner-only socket) until cancelled"""
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # Left behind by a previous run
+        self.server = await asyncio.start_unix_server(self._handle_client, self.path, limit=MAX_REQUEST)
+        os.chmod(self.path, 0o600)
+        print(f"Order API listening on {self.path}")
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    async def _handle_client(self, reader, writer):
+        """Run each request line as its own task and write answers as they complete"""
+        lock = asyncio.Lock()
+        pending = set()
+
+        async def answer(line):
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"ok": False, "error": "Invalid JSON"}
+            else:
+                response = await self.trader.handle_async(request)
+            async with lock:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(answer(line))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        except (ConnectionError, ValueError):
+            pass  # ValueError: a line over MAX_REQUEST
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+
+def _order_from_args(args):
+    """Single order from the submit command line"""
+    order = {"ticker": args.ticker, "stop": args.stop, "action": args.action}
+    for key, value in (("qty", args.qty), ("risk", args.risk), ("entry", args.entry), ("type", args.type)):
+        if value is not None:
+            order[key] = value
+    return order
+
+def _read_batch(path):
+    """Orders from a JSON-lines file ("-" for stdin)"""
+    with (contextlib.nullcontext(sys.stdin) if path == "-" else open(path)) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+async def _submit_all(trader, orders):
+    """Send every order concurrently over the one connection"""
+    return await asyncio.gather(*(trader.handle_async(dict(order, cmd="submit")) for order in orders))
+
+def main():
+    """Headless entry point"""
+    parser = argparse.ArgumentParser(description="IB Order Panel headless order entry")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Run against the in-process simulated gateway instead of TWS/IB Gateway")
+    parser.add_argument("--port", type=int, help="IB Gateway/TWS port (default: config port)")
+    parser.add_argument("--ack-timeout", type=float, default=5,
+                        help="Seconds to wait for TWS to acknowledge each order")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Submit one order, or a batch of JSON-lines orders")
+    submit.add_argument("ticker", nargs="?", help="Symbol")
+    submit.add_argument("--stop", type=float, help="Stop price")
+    size = submit.add_mutually_exclusive_group()
+    size.add_argument("--qty", type=int, help="Shares")
+    size.add_argument("--risk", type=float, help="Percent of net liquidation to risk (default: config risk_percent)")
+    submit.add_argument("--action", default="BUY", choices=("BUY", "SELL"))
+    submit.add_argument("--type", choices=ORDER_TYPES, help="Order type (default: Market + 3 Stops)")
+    submit.add_argument("--entry", type=float, help="Limit price (default: live price)")
+    submit.add_argument("--batch", help="JSON-lines file of orders, '-' for stdin")
+
+    serve = commands.add_parser("serve", help="Serve the JSON API on a Unix socket")
+    serve.add_argument("--socket", help="Socket path (default: config api_socket)")
+    args = parser.parse_args()
+
+    if args.command == "submit":
+        if args.batch:
+            orders = _read_batch(args.batch)
+        elif args.ticker and args.stop is not None:
+            orders = [_order_from_args(args)]
+        else:
+            parser.error("submit needs a ticker and --stop, or --batch")
+
+    # Results go to stdout; connector and gateway chatter goes to stderr
+    out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        config = load_config()
+        ib_factory = None
+        if args.simulate:
+            from sim_gateway import SimulatedGateway
+            ib_factory = SimulatedGateway().create_ib
+        ib_connector = connector_from_config(config, ib_factory)
+        trader = HeadlessTrader(ib_connector, float(config.get("risk_percent", "1.0")),
+                                ack_timeout=args.ack_timeout)
+
+        if not ib_connector.connect(args.port or int(config.get("port", "4001"))):
+            print(json.dumps({"ok": False, "error": "Could not connect to IB Gateway"}), file=out)
+            sys.exit(1)
+        try:
+            if args.command == "submit":
+                results = ib_connector.loop_thread.run(_submit_all(trader, orders))
+                for result in results:
+                    print(json.dumps(result), file=out)
+                out.flush()
+                if not all(result["ok"] for result in results):
+                    sys.exit(1)
+            else:
+                api = SocketAPI(trader, args.socket or config.get("api_socket", DEFAULT_SOCKET))
+                serving = ib_connector.loop_thread.submit(api.serve_forever())
+                try:
+                    serving.result()
+                except KeyboardInterrupt:
+                    serving.cancel()  # Closes the server and removes the socket file
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # Market entries are followed until filled (or fill_timeout passes) and their
+            # fills journaled; disconnecting first would leave an unfilled entry working at TWS
+            waiting = ib_connector.loop_thread.submit(ib_connector.wait_for_fills_async())
+            try:
+                waiting.result()
+            except KeyboardInterrupt:
+                waiting.cancel()
+            ib_connector.disconnect()
+            if ib_connector.journal is not None:
+                ib_connector.journal.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,291 +1,817 @@
 """
 IB Connector Module
 Handles connection to Interactive Brokers and trading operations
+
+All IB traffic runs on a dedicated asyncio event-loop thread. Each operation
+has an async implementation (``*_async``); the plain methods are blocking
+wrappers kept for callers that are happy to wait, and ``run_async`` hands
+back a concurrent.futures.Future for callers (like the Tk thread) that are not.
 """
 from ib_insync import *
+import asyncio
+import sqlite3
 import time
+from contract_cache import ContractCache
+from quote_cache import QuoteCache
+from loop_thread import EventLoopThread
+from bar_store import BarStore
+from account_state import AccountState
+from order_staging import StagedOrder
+from latency import LatencyTracker, ACK_STATUSES
+from trade_journal import TradeJournal, JOURNAL_FILE
+
+SESSION_NAMES = ('orders', 'market_data', 'history')
+DEFAULT_CLIENT_IDS = {'orders': 1, 'market_data': 2, 'history': 3}
+COMMISSION_WAIT = 5  # Seconds to wait for commission reports of executions downloaded at connect
+# Order types that split the quantity across three exit legs need a share for each
+MIN_QUANTITIES = {'Market + 3 Stops': 3, 'Market + 3 Stops + OCO': 3, '3 Stops Only': 3}
+ORDER_TYPES = ('Market + 3 Stops', 'Market + 3 Stops + OCO', 'Market + 1 Stop', '3 Stops Only',
+               'Market Order', 'Limit Order', 'Stop Order')
 
 class IBConnector:
     """Interactive Brokers Connection Manager"""
     
-    def __init__(self):
-        self.ib = IB()
+    def __init__(self, fill_timeout=30, client_ids=None, ib_factory=IB, journal=None):
+        # One IB session per traffic class, so market data and history bursts
+        # never queue behind (or in front of) order messages
+        self.client_ids = dict(DEFAULT_CLIENT_IDS, **(client_ids or {}))
+        # ib_factory builds each session: IB for TWS, or SimulatedGateway.create_ib offline
+        self.sessions = {name: ib_factory() for name in SESSION_NAMES}
+        self.ib = self.sessions['orders']  # Orders, executions and account updates
+        self.market_data_ib = self.sessions['market_data']
+        self.history_ib = self.sessions['history']  # Historical bars and contract details
         self.toast = None  # Will be set by main application
+        self.loop_thread = EventLoopThread()
+        self.contract_cache = ContractCache()
+        self._contracts = {}  # Cache key -> Contract object built from cached details
+        self._qualifying = {}  # Cache key -> in-flight qualification task
+        self.quote_cache = QuoteCache(self.market_data_ib)
+        self.bar_store = BarStore(self.history_ib)
+        self._active_sessions = set()  # Sessions connected by the last connect_async
+        self.account_state = AccountState(self.ib)
+        self.fill_timeout = fill_timeout  # Seconds to wait for a market entry to fill
+        self.connection_id = 0  # Bumped on every successful connect
+        self.last_order_id = 0  # Highest order ID sent on this connection
+        self.last_key_to_wire = None  # Seconds from hotkey press to the last leg handed to the socket
+        self.latency = LatencyTracker()  # Per-order stage timelines
+        self.journal = journal  # TradeJournal recording orders, status changes, executions and commissions (optional)
+        self._execution_sync = None  # Running sync_executions_async task
+        self._following = set()  # place_order_async fill waits still running
+        if journal is not None:
+            journal.attach(self.ib)
+        for ib in self.sessions.values():
+            ib.errorEvent += self._on_error
     
-    def connect(self, port=4001):
-        """Connect to IB Gateway/TWS"""
+    def run_async(self, coro):
+        """
+        Schedule a coroutine (e.g. self.get_market_data_async(...)) on the IB loop thread
+        Returns: concurrent.futures.Future, safe to poll from the Tk thread
+        """
+        return self.loop_thread.submit(coro)
+    
+    def _run(self, coro):
+        """Run a coroutine on the IB loop thread and wait for its result"""
+        return self.loop_thread.run(coro)
+    
+    async def connect_async(self, port=4001):
+        """Connect all sessions to IB Gateway/TWS"""
         try:
-            if self.ib.isConnected():
+            if any(ib.isConnected() for ib in self.sessions.values()):
                 print("Disconnecting existing connection...")
-                self.ib.disconnect()
-                time.sleep(0.5)
+                self._disconnect_sessions()
+                await asyncio.sleep(0.5)
             
             print(f"Connecting to IB Gateway on port {port}...")
-            self.ib.connect('127.0.0.1', port, clientId=1, timeout=10)
+            results = await asyncio.gather(
+                *(self._connect_session(name, port) for name in SESSION_NAMES),
+                return_exceptions=True
+            )
+            errors = dict(zip(SESSION_NAMES, results))
+            if isinstance(errors['orders'], Exception):
+                self._disconnect_sessions()
+                raise errors['orders']
             print("Connected successfully!")
+            
+            # A data session that failed to open falls back to sharing the order session
+            for name in ('market_data', 'history'):
+                if isinstance(errors[name], Exception):
+                    print(f"Warning: Could not open {name} session (clientId {self.client_ids[name]}): "
+                          f"{errors[name]}. Sharing the order session instead.")
+            self.market_data_ib = self._session_or_orders('market_data')
+            self.history_ib = self._session_or_orders('history')
+            self.quote_cache.bind(self.market_data_ib)
+            self.bar_store.bind(self.history_ib)
+            
+            self._active_sessions = {name for name, ib in self.sessions.items() if ib.isConnected()}
+            self.connection_id += 1
+            self.last_order_id = 0
+            
+            # Restore state that does not survive a new connection
+            self.account_state.load()
+            self.quote_cache.resubscribe()
+            asyncio.ensure_future(self.bar_store.restore())
+            if self.journal is not None and (self._execution_sync is None or self._execution_sync.done()):
+                self._execution_sync = asyncio.ensure_future(self.sync_executions_async())
             return True
         except Exception as e:
             print(f"Warning: Could not connect to IB Gateway: {e}")
             print("The program will continue, but trading functions will not work until connected.")
             return False
     
+    async def _connect_session(self, name, port):
+        """Connect one named session with its own client ID"""
+        await self.sessions[name].connectAsync(
+            '127.0.0.1', port,
+            clientId=self.client_ids[name],
+            timeout=10,
+            readonly=(name != 'orders')
+        )
+    
+    def sessions_healthy(self):
+        """Check that the order session and every data session opened with it are still up"""
+        return self.ib.isConnected() and all(
+            self.sessions[name].isConnected() for name in self._active_sessions
+        )
+    
+    def dropped_sessions(self):
+        """Data sessions opened by the last connect that have gone away since (order session aside)"""
+        return [name for name in SESSION_NAMES
+                if name != 'orders' and name in self._active_sessions and not self.sessions[name].isConnected()]
+    
+    async def reconnect_session_async(self, name, port=4001):
+        """
+        Reopen one dropped data session, leaving the order session and its trades alone;
+        if it cannot be reopened, its traffic shares the order session until it is back
+        Returns: True if the session reconnected
+        """
+        try:
+            await self._connect_session(name, port)
+        except Exception as e:
+            print(f"Warning: Could not reopen {name} session (clientId {self.client_ids[name]}): {e}")
+            self._rebind_data_sessions()
+            return False
+        print(f"Reopened {name} session")
+        self._rebind_data_sessions(reopened=name)
+        return True
+    
+    def _rebind_data_sessions(self, reopened=None):
+        """
+        Point the quote cache and bar store at whichever session now serves them,
+        restoring their streams there (and on a reopened session, whose streams died with it)
+        """
+        market_data_ib = self._session_or_orders('market_data')
+        if market_data_ib is not self.market_data_ib or reopened == 'market_data':
+            self.market_data_ib = market_data_ib
+            self.quote_cache.bind(market_data_ib)
+            self.quote_cache.resubscribe()
+        history_ib = self._session_or_orders('history')
+        if history_ib is not self.history_ib or reopened == 'history':
+            self.history_ib = history_ib
+            self.bar_store.bind(history_ib)
+            asyncio.ensure_future(self.bar_store.restore())
+    
+    def _session_or_orders(self, name):
+        """Get a session if it is connected, otherwise the order session"""
+        session = self.sessions[name]
+        return session if session.isConnected() else self.ib
+    
+    def _disconnect_sessions(self):
+        """Disconnect every open session"""
+        for ib in self.sessions.values():
+            if ib.isConnected():
+                ib.disconnect()
+    
+    async def sync_executions_async(self, wait=COMMISSION_WAIT):
+        """
+        Merge the day's executions into the journal, so fills made while the panel was not
+        running are recorded. ib_insync already downloads them on every connect; the ones
+        from before this connection get their commission reports afterwards, with no
+        event, so those are polled for up to wait seconds.
+        Returns: number of executions merged, or None if there is no journal or it failed
+        """
+        if self.journal is None or not self.ib.isConnected():
+            return None
+        try:
+            fills = self.ib.fills()
+            pending = []
+            for fill in fills:
+                self.journal.record_execution(None, fill)
+                if fill.commissionReport.execId:
+                    self.journal.record_commission(None, fill, fill.commissionReport)
+                else:
+                    pending.append(fill)
+            deadline = time.monotonic() + wait
+            while pending and self.ib.isConnected() and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+                for fill in [fill for fill in pending if fill.commissionReport.execId]:
+                    self.journal.record_commission(None, fill, fill.commissionReport)
+                    pending.remove(fill)
+            print(f"Synced {len(fills)} executions" +
+                  (f" ({len(pending)} without a commission report)" if pending else ""))
+            return len(fills)
+        except Exception as e:
+            print(f"Error syncing executions: {e}")
+            return None
+    
+    def connect(self, port=4001):
+        """Connect to IB Gateway/TWS (blocking)"""
+        return self._run(self.connect_async(port))
+    
     def is_connected(self):
         """Check if connected to IB"""
         return self.ib.isConnected()
     
-    def disconnect(self):
+    async def disconnect_async(self):
         """Disconnect from IB"""
-        if self.ib.isConnected():
-            self.ib.disconnect()
+        self._disconnect_sessions()
     
-    def get_account_values(self):
+    def disconnect(self):
+        """Disconnect from IB (blocking); also writes out pending contract cache changes"""
+        self._run(self.disconnect_async())
+        self.contract_cache.flush()
+    
+    def _on_error(self, req_id, error_code, error_string, contract):
+        """errorEvent handler: forget a cached contract TWS no longer has a definition for"""
+        if error_code == 200 and contract is not None and contract.symbol:
+            exchange = contract.exchange or 'SMART'
+            currency = contract.currency or 'USD'
+            self.contract_cache.invalidate(contract.symbol, exchange, currency)
+            self._contracts.pop(ContractCache.make_key(contract.symbol, exchange, currency), None)
+    
+    async def get_account_values_async(self):
         """Get account values"""
         if not self.ib.isConnected():
             return None
         return self.ib.accountValues()
     
-    def get_positions(self):
+    def get_account_values(self):
+        """Get account values (blocking)"""
+        return self._run(self.get_account_values_async())
+    
+    async def get_positions_async(self):
         """Get current positions"""
         if not self.ib.isConnected():
             return []
         return self.ib.positions()
     
-    def get_market_data(self, ticker, timeout=5):
+    def get_positions(self):
+        """Get current positions (blocking)"""
+        return self._run(self.get_positions_async())
+    
+    def get_account_value(self, tag, currency='USD'):
+        """
+        Get one account value (e.g. 'NetLiquidation') from the event-fed index
+        Returns: float or None
+        """
+        return self.account_state.get_value(tag, currency)
+    
+    def get_position_qty(self, ticker):
+        """Get the position size for a ticker from the event-fed index (0 if flat)"""
+        position = self.account_state.get_position(ticker.upper())
+        return position.position if position is not None else 0
+    
+    async def get_contract_async(self, ticker, exchange='SMART', currency='USD'):
         """
-        Get market data for a ticker
+        Get a qualified stock contract, asking TWS only on a cache miss
+        Concurrent lookups of the same symbol share one request
+        Returns: Contract (raises ValueError if TWS does not know the symbol)
+        """
+        ticker = ticker.upper()
+        entry = self.contract_cache.get(ticker, exchange, currency)
+        key = ContractCache.make_key(ticker, exchange, currency)
+        
+        if entry is None:
+            task = self._qualifying.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._qualify_contract(ticker, exchange, currency))
+                self._qualifying[key] = task
+                task.add_done_callback(lambda t: self._qualifying.pop(key, None))
+            # Shielded: a cancelled caller must not abort a lookup others share
+            entry = await asyncio.shield(task)
+            self._contracts.pop(key, None)
+        
+        contract = self._contracts.get(key)
+        if contract is None or contract.conId != entry["conId"]:
+            contract = Stock(
+                ticker, exchange, currency,
+                conId=entry["conId"],
+                primaryExchange=entry["primaryExchange"]
+            )
+            self._contracts[key] = contract
+        return contract
+    
+    async def _qualify_contract(self, ticker, exchange, currency):
+        """Ask TWS for contract details and store them in the contract cache"""
+        details = await self.history_ib.reqContractDetailsAsync(Stock(ticker, exchange, currency))
+        if not details:
+            raise ValueError(f"Unknown contract: {ticker}")
+        if len(details) > 1:
+            raise ValueError(f"Ambiguous contract: {ticker}")
+        detail = details[0]
+        return self.contract_cache.put(
+            ticker, exchange, currency,
+            detail.contract.conId,
+            detail.contract.primaryExchange,
+            detail.minTick
+        )
+    
+    def get_contract(self, ticker, exchange='SMART', currency='USD'):
+        """Get a qualified stock contract (blocking)"""
+        return self._run(self.get_contract_async(ticker, exchange, currency))
+    
+    async def get_market_data_async(self, ticker, timeout=5):
+        """
+        Get market data for a ticker from the streaming quote cache
+        Only waits (up to timeout seconds) for the first tick of a new subscription
         Returns: current_price or None
         """
         try:
-            contract = Stock(ticker, 'SMART', 'USD')
-            self.ib.qualifyContracts(contract)
-            
-            # Cancel any existing market data for this contract first (silently)
-            try:
-                for ticker_obj in self.ib.tickers():
-                    if ticker_obj.contract.symbol == ticker:
-                        self.ib.cancelMktData(ticker_obj.contract)
-                        self.ib.sleep(0.1)
-            except:
-                pass
-            
-            # Request fresh market data
-            self.ib.reqMktData(contract, '', False, False)
-            self.ib.sleep(1)  # Give initial time for data to start flowing
-            
-            # Wait for valid market data
-            current_price = None
-            for i in range(10):
-                ticker_data = self.ib.ticker(contract)
-                
-                if ticker_data.marketPrice() and ticker_data.marketPrice() > 0:
-                    current_price = ticker_data.marketPrice()
-                    break
-                elif ticker_data.last and ticker_data.last > 0:
-                    current_price = ticker_data.last
-                    break
-                elif ticker_data.close and ticker_data.close > 0:
-                    current_price = ticker_data.close
-                    break
-                
-                self.ib.sleep(0.5)
-            
-            # If still no price, try one last time
-            if not current_price:
-                ticker_data = self.ib.ticker(contract)
-                if ticker_data.marketPrice() and ticker_data.marketPrice() > 0:
-                    current_price = ticker_data.marketPrice()
-                elif ticker_data.last and ticker_data.last > 0:
-                    current_price = ticker_data.last
-                elif ticker_data.close and ticker_data.close > 0:
-                    current_price = ticker_data.close
-            
-            self.ib.cancelMktData(contract)
-            return current_price
+            ticker = ticker.upper()
+            self.quote_cache.set_active(ticker, await self.get_contract_async(ticker))
+            return await self.quote_cache.wait_for_price(ticker, timeout)
         except Exception as e:
             print(f"Error getting market data for {ticker}: {e}")
             return None
     
-    def get_lod_hod(self, ticker):
+    async def pin_quote_async(self, ticker, timeout=5):
+        """
+        Stream a ticker without making it the active one, so concurrent orders, web
+        pages and the panel's own ticker keep their quotes; pair with unpin_quote()
+        Only waits (up to timeout seconds) for the first tick of a new subscription
+        Returns: current_price or None (raises if the contract lookup fails, leaving nothing pinned)
+        """
+        ticker = ticker.upper()
+        self.quote_cache.pin(ticker, await self.get_contract_async(ticker))
+        return await self.quote_cache.wait_for_price(ticker, timeout)
+    
+    def unpin_quote(self, ticker):
+        """Release a pin_quote_async subscription (IB loop thread)"""
+        self.quote_cache.unpin(ticker.upper())
+    
+    def get_market_data(self, ticker, timeout=5):
+        """Get market data for a ticker (blocking)"""
+        return self._run(self.get_market_data_async(ticker, timeout))
+    
+    def get_quote(self, ticker):
+        """
+        Get the cached streaming quote for a ticker without waiting
+        Returns: Quote (with .updated timestamp) or None if not subscribed
+        """
+        return self.quote_cache.get(ticker.upper())
+    
+    async def set_watchlist_async(self, symbols):
+        """Keep streaming subscriptions open for the watchlist symbols"""
+        if not self.ib.isConnected():
+            return
+        symbols = [symbol.upper() for symbol in symbols if symbol]
+        results = await asyncio.gather(
+            *(self.get_contract_async(symbol) for symbol in symbols),
+            return_exceptions=True
+        )
+        contracts = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                print(f"Error subscribing watchlist symbol {symbol}: {result}")
+            else:
+                contracts[symbol] = result
+        self.quote_cache.set_watchlist(contracts)
+    
+    def set_watchlist(self, symbols):
+        """Keep streaming subscriptions open for the watchlist symbols (blocking)"""
+        self._run(self.set_watchlist_async(symbols))
+    
+    async def get_lod_hod_async(self, ticker):
         """
         Get Low of Day (LOD) and High of Day (HOD) for a ticker
+        Backfills once per symbol, then reads the running values from the bar store
         Returns: (lod, hod) or (None, None)
         """
         try:
-            contract = Stock(ticker, 'SMART', 'USD')
-            self.ib.qualifyContracts(contract)
-            bars = self.ib.reqHistoricalData(
-                contract,
-                endDateTime='',
-                durationStr='1 D',
-                barSizeSetting='1 min',
-                whatToShow='TRADES',
-                useRTH=True,
-                formatDate=1
-            )
-            if bars:
-                lod = min(bar.low for bar in bars)
-                hod = max(bar.high for bar in bars)
-                return lod, hod
-            return None, None
+            ticker = ticker.upper()
+            series = self.bar_store.get(ticker)
+            if series is None:
+                series = await self.bar_store.ensure(ticker, await self.get_contract_async(ticker))
+            return series.lod_hod()
         except Exception as e:
             print(f"Error getting LOD/HOD for {ticker}: {e}")
             return None, None
     
-    def submit_order(self, ticker, qty, stop_price, entry_price, action, order_type):
+    def get_lod_hod(self, ticker):
+        """Get LOD/HOD for a ticker (blocking)"""
+        return self._run(self.get_lod_hod_async(ticker))
+    
+    async def get_ticker_snapshot_async(self, ticker, include_lod_hod=False):
+        """
+        Fetch price and (optionally) LOD/HOD for a ticker concurrently
+        Returns: dict with 'price', 'position', 'lod', 'hod'
+        """
+        requests = [self.get_market_data_async(ticker)]
+        if include_lod_hod:
+            requests.append(self.get_lod_hod_async(ticker))
+        results = await asyncio.gather(*requests)
+        lod, hod = results[1] if include_lod_hod else (None, None)
+        return {'price': results[0], 'position': self.get_position_qty(ticker), 'lod': lod, 'hod': hod}
+    
+    def get_ticker_snapshot(self, ticker, include_lod_hod=False):
+        """Fetch price, position and LOD/HOD for a ticker (blocking)"""
+        return self._run(self.get_ticker_snapshot_async(ticker, include_lod_hod))
+    
+    async def _wait_for_fill(self, trade):
+        """
+        Wait for an entry order to finish, driven by IB events; at fill_timeout an entry
+        with nothing filled is cancelled, a partly filled one is left working
+        Returns: perf_counter() time of the fill, or None if it did not completely fill
+        """
+        state = {'fill_time': None}
+        done = asyncio.Event()
+        
+        def handle_fill(filled_trade):
+            if state['fill_time'] is None:
+                state['fill_time'] = time.perf_counter()
+            done.set()
+        
+        def handle_status(status_trade):
+            if status_trade is trade and status_trade.orderStatus.status in OrderStatus.DoneStates:
+                done.set()
+        
+        trade.filledEvent += handle_fill
+        self.ib.orderStatusEvent += handle_status
+        try:
+            if trade.isActive():
+                await asyncio.wait_for(done.wait(), self.fill_timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            trade.filledEvent -= handle_fill
+            self.ib.orderStatusEvent -= handle_status
+        
+        if trade.isActive():
+            status = trade.orderStatus
+            if status.filled:
+                # Cancelling the parent would also cancel the stops protecting the shares already filled
+                print(f"Order {trade.order.orderId} only {status.filled:g} of {trade.order.totalQuantity:g} "
+                      f"filled after {self.fill_timeout}s, leaving it and its exits working")
+            else:
+                # Nothing filled: pull it (and its attached exits) rather than leave it open
+                print(f"Order {trade.order.orderId} not filled after {self.fill_timeout}s, cancelling")
+                self.ib.cancelOrder(trade.order)
+        if trade.orderStatus.status == 'Filled' and state['fill_time'] is None:
+            state['fill_time'] = time.perf_counter()
+        return state['fill_time']
+    
+    def _stop_ladder(self, action, reference_price, stop_price):
+        """Calculate the 3 ladder stop prices between the reference price and the stop"""
+        price_diff = reference_price - stop_price if action == 'BUY' else stop_price - reference_price
+        return [
+            round(stop_price + price_diff * 2 / 3, 2) if action == 'BUY' else round(stop_price - price_diff * 2 / 3, 2),
+            round(stop_price + price_diff * 1 / 3, 2) if action == 'BUY' else round(stop_price - price_diff * 1 / 3, 2),
+            round(stop_price, 2)
+        ]
+    
+    def _reference_price(self, ticker, action, entry_price):
+        """Expected entry price for a market order: live ask/bid if streaming, else the entry field"""
+        quote = self.get_quote(ticker)
+        if quote is not None:
+            side_price = quote.ask if action == 'BUY' else quote.bid
+            for value in (side_price, quote.price()):
+                if value:
+                    return value
+        return entry_price
+    
+    def build_order_group(self, action, qty, stop_price, entry_price, order_type, reference_price=None, reserve_ids=True):
+        """
+        Build the entry and exit legs for an order type as one transmit group
+        Market entries are the parent; exits are children (parentId, transmit=False)
+        and only the last leg transmits, so TWS receives and arms the whole group at once.
+        Returns: (orders, details) - details holds the calculated exit prices
+                 (raises ValueError for an unknown type or a quantity below MIN_QUANTITIES)
+        """
+        min_qty = MIN_QUANTITIES.get(order_type, 1)
+        if qty < min_qty:
+            # A 0-share leg would be rejected and could take the rest of the group's protection with it
+            raise ValueError(f"{order_type} needs at least {min_qty} shares")
+        exit_action = 'SELL' if action == 'BUY' else 'BUY'
+        if reference_price is None:
+            reference_price = entry_price
+        details = {'reference_price': reference_price}
+        
+        if order_type == 'Market + 3 Stops':
+            stop_prices = self._stop_ladder(action, reference_price, stop_price)
+            stop_sizes = [qty // 3, qty // 3, qty - 2 * (qty // 3)]
+            exits = [StopOrder(exit_action, sq, sp, tif='GTC') for sp, sq in zip(stop_prices, stop_sizes)]
+            details['stop_prices'] = stop_prices
+            orders = [MarketOrder(action, qty)] + exits
+        
+        elif order_type == 'Market + 1 Stop':
+            orders = [MarketOrder(action, qty), StopOrder(exit_action, qty, stop_price, tif='GTC')]
+            details['stop_prices'] = [stop_price]
+        
+        elif order_type == 'Market + 3 Stops + OCO':
+            price_diff = reference_price - stop_price if action == 'BUY' else stop_price - reference_price
+            stop_prices = self._stop_ladder(action, reference_price, stop_price)
+            
+            # Calculate sizes: 1/3 for OCO, remaining 2/3 divided between the other stops
+            oco_qty = qty // 3
+            remaining_qty = qty - oco_qty
+            stop_sizes = [remaining_qty // 2, remaining_qty - remaining_qty // 2]
+            
+            # Calculate 2R price (target price for limit exit); OCO stop is the one closest to entry
+            if action == 'BUY':
+                target_price = round(reference_price + 2 * price_diff, 2)
+            else:
+                target_price = round(reference_price - 2 * price_diff, 2)
+            oco_stop_price = stop_prices[0]
+            
+            # Create OCO group ID (unique identifier for the OCO pair)
+            oca_group = f"OCO_{int(time.time() * 1000)}"
+            
+            limit_order = LimitOrder(exit_action, oco_qty, target_price, tif='GTC')
+            limit_order.ocaGroup = oca_group
+            limit_order.ocaType = 1  # One-Cancels-Other
+            
+            oco_stop_order = StopOrder(exit_action, oco_qty, oco_stop_price, tif='GTC')
+            oco_stop_order.ocaGroup = oca_group
+            oco_stop_order.ocaType = 1  # One-Cancels-Other
+            
+            # The remaining 2 stop orders cover the rest of the position
+            orders = [MarketOrder(action, qty), limit_order, oco_stop_order] + [
+                StopOrder(exit_action, stop_sizes[i-1], stop_prices[i], tif='GTC') for i in range(1, 3)
+            ]
+            details.update(stop_prices=stop_prices, target_price=target_price,
+                           oco_stop_price=oco_stop_price, oca_group=oca_group)
+        
+        elif order_type == '3 Stops Only':
+            # No parent to hang these on: each stop transmits on its own, sent back-to-back
+            stop_prices = self._stop_ladder(action, entry_price, stop_price)
+            stop_sizes = [qty // 3, qty // 3, qty - 2 * (qty // 3)]
+            details['stop_prices'] = stop_prices
+            orders = [StopOrder(exit_action, sq, sp, tif='GTC') for sp, sq in zip(stop_prices, stop_sizes)]
+            if reserve_ids:
+                for order in orders:
+                    order.orderId = self.ib.client.getReqId()
+            return orders, details
+        
+        elif order_type == 'Market Order':
+            orders = [MarketOrder(action, qty)]
+        
+        elif order_type == 'Limit Order':
+            orders = [LimitOrder(action, qty, entry_price)]
+        
+        elif order_type == 'Stop Order':
+            orders = [StopOrder(action, qty, stop_price)]
+        
+        else:
+            raise ValueError("Unknown order type selected.")
+        
+        # Reserve IDs up front so children can reference the parent before anything is sent
+        if reserve_ids:
+            parent = orders[0]
+            parent.orderId = self.ib.client.getReqId()
+            for child in orders[1:]:
+                child.orderId = self.ib.client.getReqId()
+                child.parentId = parent.orderId
+        for order in orders:
+            order.transmit = False
+        orders[-1].transmit = True
+        return orders, details
+    
+    def place_order_group(self, contract, orders):
+        """
+        Send a built order group to TWS in one burst (no waits between legs)
+        Must run on the IB loop thread
+        Returns: list of trades, parent first
+        """
+        trades = [self.ib.placeOrder(contract, order) for order in orders]
+        self.last_order_id = max([self.last_order_id] + [order.orderId for order in orders])
+        return trades
+    
+    async def stage_order_async(self, ticker, qty, stop_price, entry_price, action, order_type):
+        """
+        Build everything an order needs short of sending it: qualified contract,
+        exit prices and sizes, OCA group and reserved order IDs
+        Returns: StagedOrder
+        """
+        ticker = ticker.upper()
+        contract = await self.get_contract_async(ticker)
+        reference_price = self._reference_price(ticker, action, entry_price)
+        orders, details = self.build_order_group(action, qty, stop_price, entry_price, order_type, reference_price)
+        # One order ref for the whole group, so the journal and TWS can tie the legs together
+        details['order_ref'] = f"panel-{ticker}-{orders[0].orderId}"
+        for order in orders:
+            order.orderRef = details['order_ref']
+        return StagedOrder(ticker, qty, stop_price, entry_price, action, order_type,
+                           contract, orders, details, self.connection_id)
+    
+    def _staged_is_usable(self, staged):
+        """Check that a staged group's reserved IDs can still be sent"""
+        return (staged.connection_id == self.connection_id
+                and staged.first_order_id > self.last_order_id)
+    
+    def _reprice_staged(self, staged):
+        """Re-anchor a staged group's exit prices to the current reference price"""
+        reference_price = self._reference_price(staged.ticker, staged.action, staged.entry_price)
+        if reference_price == staged.details['reference_price']:
+            return
+        fresh_orders, details = self.build_order_group(
+            staged.action, staged.qty, staged.stop_price, staged.entry_price,
+            staged.order_type, reference_price, reserve_ids=False
+        )
+        for staged_order, fresh_order in zip(staged.orders, fresh_orders):
+            staged_order.auxPrice = fresh_order.auxPrice
+            staged_order.lmtPrice = fresh_order.lmtPrice
+        details.pop('oca_group', None)  # Keep the group name already on the staged legs
+        staged.details.update(details)
+    
+    def _track_acks(self, trades, timeline, has_parent=True):
+        """Mark submitted_ack and exits_acked on a timeline as TWS acknowledges each leg"""
+        entry_trade = trades[0]
+        exit_trades = trades[1:] if has_parent else trades
+        pending = {trade.order.orderId for trade in exit_trades}
+        
+        def handle_status(trade):
+            status = trade.orderStatus.status
+            if status in ACK_STATUSES:
+                if trade is entry_trade:
+                    timeline.mark('submitted_ack')
+                pending.discard(trade.order.orderId)
+                if exit_trades and not pending:
+                    timeline.mark('exits_acked')
+            if status in ACK_STATUSES or status in OrderStatus.DoneStates:
+                trade.statusEvent -= handle_status
+        
+        for trade in trades:
+            trade.statusEvent += handle_status
+    
+    async def submit_order_async(self, ticker, qty, stop_price, entry_price, action, order_type,
+                                 staged=None, timeline=None):
         """
         Submit an order to IB
+        Entry and protective exits go out as one parent/child group. A matching
+        StagedOrder is transmitted as-is; otherwise the group is built first.
+        timeline: OrderTimeline from self.latency to record stage timings on
         Returns: (success, message)
         """
         try:
             if not self.ib.isConnected():
                 return False, "Not connected to IB Gateway"
             
-            contract = Stock(ticker, 'SMART', 'USD')
-            self.ib.qualifyContracts(contract)
-
-            if order_type == 'Market + 3 Stops':
-                market_order = MarketOrder(action, qty)
-                trade = self.ib.placeOrder(contract, market_order)
-                while trade.isActive():
-                    self.ib.sleep(1)
-
-                if trade.orderStatus.status != 'Filled':
-                    return False, "Market order was not filled."
-
-                avg_fill_price = trade.orderStatus.avgFillPrice
-                price_diff = avg_fill_price - stop_price if action == 'BUY' else stop_price - avg_fill_price
-
-                stop_prices = [
-                    round(stop_price + price_diff * 2 / 3, 2) if action == 'BUY' else round(stop_price - price_diff * 2 / 3, 2),
-                    round(stop_price + price_diff * 1 / 3, 2) if action == 'BUY' else round(stop_price - price_diff * 1 / 3, 2),
-                    round(stop_price, 2)
-                ]
-                stop_sizes = [qty // 3, qty // 3, qty - 2 * (qty // 3)]
-
-                for sp, sq in zip(stop_prices, stop_sizes):
-                    stop_order = StopOrder('SELL' if action == 'BUY' else 'BUY', sq, sp, tif='GTC')
-                    self.ib.placeOrder(contract, stop_order)
-                    self.ib.sleep(0.5)
-
-                return True, f"{action} {qty} shares of {ticker} at ${avg_fill_price:.2f}. 3 stop-loss orders submitted."
-
-            elif order_type == '3 Stops Only':
-                price_diff = entry_price - stop_price if action == 'BUY' else stop_price - entry_price
-                stop_prices = [
-                    round(stop_price + price_diff * 2 / 3, 2) if action == 'BUY' else round(stop_price - price_diff * 2 / 3, 2),
-                    round(stop_price + price_diff * 1 / 3, 2) if action == 'BUY' else round(stop_price - price_diff * 1 / 3, 2),
-                    round(stop_price, 2)
-                ]
-                stop_sizes = [qty // 3, qty // 3, qty - 2 * (qty // 3)]
-
-                for sp, sq in zip(stop_prices, stop_sizes):
-                    stop_order = StopOrder('SELL' if action == 'BUY' else 'BUY', sq, sp, tif='GTC')
-                    self.ib.placeOrder(contract, stop_order)
-                    self.ib.sleep(0.5)
-
+            ticker = ticker.upper()
+            if (staged is not None and staged.matches(ticker, qty, stop_price, entry_price, action, order_type)
+                    and self._staged_is_usable(staged)):
+                self._reprice_staged(staged)
+            else:
+                staged = await self.stage_order_async(ticker, qty, stop_price, entry_price, action, order_type)
+            details = staged.details
+            if timeline is not None:
+                timeline.mark('contract_ready')
+                timeline.mark('place_order')
+            
+            trades = self.place_order_group(staged.contract, staged.orders)
+            exits_sent = time.perf_counter()
+            if self.journal is not None:
+                self.journal.record_group(staged)
+            if timeline is not None:
+                self.last_key_to_wire = exits_sent - timeline.origin()
+                self._track_acks(trades, timeline, has_parent=(order_type != '3 Stops Only'))
+            
+            if order_type in ('Limit Order', 'Stop Order', '3 Stops Only'):
+                if order_type == 'Limit Order':
+                    return True, f"Limit order to {action} {qty} shares of {ticker} at ${entry_price:.2f} submitted."
+                if order_type == 'Stop Order':
+                    return True, f"Stop order to {action} {qty} shares of {ticker} at stop ${stop_price:.2f} submitted."
                 return True, f"3 stop-loss orders for {qty} shares of {ticker} submitted."
-
-            elif order_type == 'Limit Order':
-                order = LimitOrder(action, qty, entry_price)
-                self.ib.placeOrder(contract, order)
-                return True, f"Limit order to {action} {qty} shares of {ticker} at ${entry_price:.2f} submitted."
-
-            elif order_type == 'Stop Order':
-                order = StopOrder(action, qty, stop_price)
-                self.ib.placeOrder(contract, order)
-                return True, f"Stop order to {action} {qty} shares of {ticker} at stop ${stop_price:.2f} submitted."
-
-            elif order_type == 'Market + 1 Stop':
-                market_order = MarketOrder(action, qty)
-                trade = self.ib.placeOrder(contract, market_order)
-                while trade.isActive():
-                    self.ib.sleep(1)
-
-                if trade.orderStatus.status != 'Filled':
-                    return False, "Market order was not filled."
-
-                avg_fill_price = trade.orderStatus.avgFillPrice
-                stop_order = StopOrder('SELL' if action == 'BUY' else 'BUY', qty, stop_price, tif='GTC')
-                self.ib.placeOrder(contract, stop_order)
-
-                return True, f"{action} {qty} shares of {ticker} at ${avg_fill_price:.2f}. 1 stop-loss order submitted at ${stop_price:.2f}."
-
-            elif order_type == 'Market + 3 Stops + OCO':
-                # Place market order
-                market_order = MarketOrder(action, qty)
-                trade = self.ib.placeOrder(contract, market_order)
-                while trade.isActive():
-                    self.ib.sleep(1)
-
-                if trade.orderStatus.status != 'Filled':
-                    return False, "Market order was not filled."
-
-                avg_fill_price = trade.orderStatus.avgFillPrice
-                price_diff = avg_fill_price - stop_price if action == 'BUY' else stop_price - avg_fill_price
-
-                # Calculate the 3 stop prices
-                stop_prices = [
-                    round(stop_price + price_diff * 2 / 3, 2) if action == 'BUY' else round(stop_price - price_diff * 2 / 3, 2),
-                    round(stop_price + price_diff * 1 / 3, 2) if action == 'BUY' else round(stop_price - price_diff * 1 / 3, 2),
-                    round(stop_price, 2)
-                ]
-                # Calculate sizes: 1/3 for OCO, remaining 2/3 divided between the other stops
-                oco_qty = qty // 3
-                remaining_qty = qty - oco_qty
-                stop_sizes = [remaining_qty // 2, remaining_qty - remaining_qty // 2]
-
-                # Calculate 2R price (target price for limit sell)
-                if action == 'BUY':
-                    target_price = round(avg_fill_price + 2 * price_diff, 2)
-                    oco_stop_price = stop_prices[0]  # Highest stop (closest to entry)
-                else:
-                    target_price = round(avg_fill_price - 2 * price_diff, 2)
-                    oco_stop_price = stop_prices[0]  # Highest stop
-                
-                # Create OCO group ID (unique identifier for the OCO pair)
-                oca_group = f"OCO_{int(time.time() * 1000)}"
-
-                # Create limit sell order (target at 2R)
-                limit_order = LimitOrder('SELL' if action == 'BUY' else 'BUY', oco_qty, target_price, tif='GTC')
-                limit_order.ocaGroup = oca_group
-                limit_order.ocaType = 1  # One-Cancels-Other
-                
-                # Create stop order (highest stop)
-                oco_stop_order = StopOrder('SELL' if action == 'BUY' else 'BUY', oco_qty, oco_stop_price, tif='GTC')
-                oco_stop_order.ocaGroup = oca_group
-                oco_stop_order.ocaType = 1  # One-Cancels-Other
-
-                # Place OCO orders
-                self.ib.placeOrder(contract, limit_order)
-                self.ib.sleep(0.2)
-                self.ib.placeOrder(contract, oco_stop_order)
-                self.ib.sleep(0.5)
-
-                # Place the remaining 2 stop orders for the rest of the position
-                for i in range(1, 3):  # Only the second and third stops
-                    stop_order = StopOrder('SELL' if action == 'BUY' else 'BUY', stop_sizes[i-1], stop_prices[i], tif='GTC')
-                    self.ib.placeOrder(contract, stop_order)
-                    self.ib.sleep(0.5)
-
-                return True, f"{action} {qty} shares of {ticker} at ${avg_fill_price:.2f}. OCO (Limit@${target_price:.2f}/Stop@${oco_stop_price:.2f}) + 2 stops submitted."
-
-            elif order_type == 'Market Order':
-                market_order = MarketOrder(action, qty)
-                trade = self.ib.placeOrder(contract, market_order)
-                while trade.isActive():
-                    self.ib.sleep(1)
-
-                if trade.orderStatus.status != 'Filled':
+            
+            # Market entry: exits are already at TWS and are armed there on fill
+            parent_trade = trades[0]
+            fill_time = await self._wait_for_fill(parent_trade)
+            if fill_time is None:
+                status = parent_trade.orderStatus
+                if not status.filled:
                     return False, "Market order was not filled."
-
-                avg_fill_price = trade.orderStatus.avgFillPrice
-                return True, f"{action} {qty} shares of {ticker} at market price ${avg_fill_price:.2f} submitted."
-
-            else:
-                return False, "Unknown order type selected."
+                return True, (f"{action} {status.filled:g} of {qty} shares of {ticker} at ${status.avgFillPrice:.2f} "
+                              f"so far; the rest of the order and its exits are still working.")
+            if timeline is not None:
+                timeline.mark('fill', fill_time)
+            
+            avg_fill_price = parent_trade.orderStatus.avgFillPrice
+            if order_type == 'Market + 3 Stops':
+                return True, f"{action} {qty} shares of {ticker} at ${avg_fill_price:.2f}. 3 stop-loss orders attached."
+            if order_type == 'Market + 1 Stop':
+                return True, f"{action} {qty} shares of {ticker} at ${avg_fill_price:.2f}. 1 stop-loss order attached at ${stop_price:.2f}."
+            if order_type == 'Market + 3 Stops + OCO':
+                return True, (f"{action} {qty} shares of {ticker} at ${avg_fill_price:.2f}. "
+                              f"OCO (Limit@${details['target_price']:.2f}/Stop@${details['oco_stop_price']:.2f}) + 2 stops attached.")
+            return True, f"{action} {qty} shares of {ticker} at market price ${avg_fill_price:.2f} submitted."
 
         except Exception as e:
             return False, str(e)
-
-
-
+    
+    def submit_order(self, ticker, qty, stop_price, entry_price, action, order_type):
+        """Submit an order to IB (blocking)"""
+        return self._run(self.submit_order_async(ticker, qty, stop_price, entry_price, action, order_type))
+    
+    async def _wait_for_ack(self, trade, timeout):
+        """
+        Wait until TWS acknowledges an order (or it is already done)
+        Returns: True if acknowledged within timeout seconds
+        """
+        def answered():
+            status = trade.orderStatus.status
+            return status in ACK_STATUSES or status in OrderStatus.DoneStates
+        
+        if answered():
+            return True
+        done = asyncio.Event()
+        
+        def handle_status(status_trade):
+            if answered():
+                done.set()
+        
+        trade.statusEvent += handle_status
+        try:
+            await asyncio.wait_for(done.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            trade.statusEvent -= handle_status
+    
+    async def _follow_fill(self, trade, timeline):
+        """Background fill wait for place_order_async (cancels market entries with nothing filled)"""
+        fill_time = await self._wait_for_fill(trade)
+        if fill_time is not None and timeline is not None:
+            timeline.mark('fill', fill_time)
+    
+    async def place_order_async(self, ticker, qty, stop_price, entry_price, action, order_type,
+                                timeline=None, ack_timeout=5):
+        """
+        Send an order group and return as soon as TWS acknowledges the entry;
+        a market entry's fill (or timeout cancel) is followed in the background
+        Returns: dict with orderId, status, avgFillPrice (None until filled),
+                 stop_prices, quantities and the other calculated details
+        """
+        if not self.ib.isConnected():
+            raise ConnectionError("Not connected to IB Gateway")
+        staged = await self.stage_order_async(ticker, qty, stop_price, entry_price, action, order_type)
+        if timeline is not None:
+            timeline.mark('contract_ready')
+            timeline.mark('place_order')
+        trades = self.place_order_group(staged.contract, staged.orders)
+        if self.journal is not None:
+            self.journal.record_group(staged)
+        has_parent = order_type != '3 Stops Only'
+        if timeline is not None:
+            self._track_acks(trades, timeline, has_parent=has_parent)
+        
+        entry_trade = trades[0]
+        acknowledged = await self._wait_for_ack(entry_trade, ack_timeout)
+        if has_parent and entry_trade.order.orderType == 'MKT':
+            task = asyncio.ensure_future(self._follow_fill(entry_trade, timeline))
+            self._following.add(task)
+            task.add_done_callback(self._following.discard)
+        
+        exit_orders = staged.orders[1:] if has_parent else staged.orders
+        status = entry_trade.orderStatus
+        result = dict(staged.details)
+        result.update(
+            orderId=entry_trade.order.orderId,
+            status=status.status if acknowledged else 'Unacknowledged',
+            avgFillPrice=status.avgFillPrice if status.filled else None,
+            stop_prices=[order.auxPrice for order in exit_orders if order.orderType == 'STP'],
+            quantities=[order.totalQuantity for order in exit_orders]
+        )
+        return result
+    
+    async def wait_for_fills_async(self):
+        """
+        Wait until every market entry sent by place_order_async has filled or been
+        cancelled at fill_timeout (call before disconnecting a short-lived process)
+        Returns: number of entries waited for
+        """
+        pending = set(self._following)
+        if pending:
+            await asyncio.wait(pending)
+        return len(pending)
+
+def connector_from_config(config, ib_factory=None):
+    """
+    Build an IBConnector from the panel's config keys (fill_timeout, client_id_*, journal_file)
+    Returns: IBConnector
+    """
+    journal = None
+    journal_file = config.get("journal_file", JOURNAL_FILE)
+    if journal_file:
+        try:
+            journal = TradeJournal(journal_file)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not open trade journal {journal_file}: {e}")
+    return IBConnector(
+        fill_timeout=float(config.get("fill_timeout", "30")),
+        client_ids={
+            "orders": int(config.get("client_id_orders", "1")),
+            "market_data": int(config.get("client_id_market_data", "2")),
+            "history": int(config.get("client_id_history", "3"))
+        },
+        ib_factory=ib_factory or IB,
+        journal=journal
+    )
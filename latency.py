@@ -0,0 +1,119 @@
+"""
+Latency Module
+Per-order stage timestamps kept in a ring buffer, with percentile
+summaries per order type and CSV export
+"""
+import csv
+import threading
+import time
+from collections import deque
+
+# Order lifecycle stages, in the order they happen
+STAGES = (
+    'hotkey',          # Place-order hotkey event handled by Tk
+    'submit_entry',    # TradingTab.submit_order entered
+    'contract_ready',  # Qualified contract and order legs ready
+    'place_order',     # First placeOrder call
+    'submitted_ack',   # TWS acknowledged the entry (PreSubmitted/Submitted)
+    'fill',            # Entry filled
+    'exits_acked'      # Last exit leg acknowledged by TWS
+)
+
+ACK_STATUSES = ('PreSubmitted', 'Submitted', 'Filled')
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class OrderTimeline:
+    """perf_counter() timestamps for each stage of one order"""
+
+    def __init__(self, order_type, ticker):
+        self.order_type = order_type
+        self.ticker = ticker
+        self.created_at = time.time()
+        self.marks = {}
+
+    def mark(self, stage, timestamp=None):
+        """Record a stage (only the first time it is reached)"""
+        self.marks.setdefault(stage, timestamp if timestamp is not None else time.perf_counter())
+
+    def origin(self):
+        """Reference time: the hotkey press if there was one, else submit entry"""
+        return self.marks.get('hotkey', self.marks.get('submit_entry'))
+
+    def elapsed_ms(self):
+        """
+        Milliseconds from the origin to each recorded stage
+        Returns: dict of stage -> ms
+        """
+        origin = self.origin()
+        if origin is None:
+            return {}
+        return {stage: (self.marks[stage] - origin) * 1000 for stage in STAGES if stage in self.marks}
+
+class LatencyTracker:
+    """Ring buffer of recent order timelines"""
+
+    def __init__(self, capacity=1000):
+        self.timelines = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def start(self, order_type, ticker, hotkey_time=None, entry_time=None):
+        """Begin a timeline for a new order (submit_entry defaults to now)"""
+        timeline = OrderTimeline(order_type, ticker)
+        if hotkey_time is not None:
+            timeline.mark('hotkey', hotkey_time)
+        timeline.mark('submit_entry', entry_time)
+        with self._lock:
+            self.timelines.append(timeline)
+        return timeline
+
+    def snapshot(self):
+        """Copy of the buffered timelines"""
+        with self._lock:
+            return list(self.timelines)
+
+    def order_types(self):
+        """Order types present in the buffer"""
+        return sorted({timeline.order_type for timeline in self.snapshot()})
+
+    def stage_samples(self, order_type=None):
+        """
+        Elapsed times per stage
+        Returns: dict of stage -> list of ms (only orders of order_type, if given)
+        """
+        samples = {stage: [] for stage in STAGES}
+        for timeline in self.snapshot():
+            if order_type is not None and timeline.order_type != order_type:
+                continue
+            for stage, ms in timeline.elapsed_ms().items():
+                samples[stage].append(ms)
+        return samples
+
+    def summary(self, order_type=None):
+        """
+        p50/p95/p99 per stage
+        Returns: dict of stage -> (count, p50, p95, p99) in ms
+        """
+        result = {}
+        for stage, values in self.stage_samples(order_type).items():
+            values.sort()
+            result[stage] = (len(values), percentile(values, 50), percentile(values, 95), percentile(values, 99))
+        return result
+
+    def export_csv(self, path):
+        """Write one row per buffered order with each stage's elapsed ms"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['created_at', 'order_type', 'ticker'] + [f"{stage}_ms" for stage in STAGES])
+            for timeline in self.snapshot():
+                elapsed = timeline.elapsed_ms()
+                writer.writerow(
+                    [time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timeline.created_at)),
+                     timeline.order_type, timeline.ticker] +
+                    [f"{elapsed[stage]:.3f}" if stage in elapsed else '' for stage in STAGES]
+                )
@@ -0,0 +1,299 @@
+"""
+Live Stream Module
+WebSocket fan-out of quotes, account values, order status and fills to the
+web terminal's browser clients
+
+IB events only mark what changed; once per frame the latest quote per symbol
+and value per account tag is handed to every client. Each client has its own
+bounded buffer: quotes and account values are kept latest-only, so a slow tab
+skips intermediate ticks, and order/fill events are capped, so memory stays
+flat and the IB loop never waits on a browser's socket.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+from collections import deque
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+FRAME_INTERVAL = 0.05    # Seconds between flushes to the clients
+MAX_EVENTS = 256         # Order/fill messages buffered per client before the oldest are dropped
+MAX_CLIENT_FRAME = 4096  # Largest frame accepted from a browser
+
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+ACCOUNT_TAGS = ('NetLiquidation', 'TotalCashValue', 'BuyingPower', 'AvailableFunds',
+                'UnrealizedPnL', 'RealizedPnL')
+
+def handshake_response(key):
+    """HTTP 101 response completing a WebSocket upgrade for Sec-WebSocket-Key"""
+    accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode("latin-1")).digest()).decode()
+    return ("HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("latin-1")
+
+def encode_frame(payload, opcode=OP_TEXT):
+    """One unmasked, unfragmented server frame"""
+    length = len(payload)
+    if length < 126:
+        head = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 65536:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return head + payload
+
+async def read_frame(reader):
+    """
+    Read one client frame (browsers always mask)
+    Returns: (opcode, payload bytes)
+    """
+    head = await reader.readexactly(2)
+    opcode = head[0] & 0x0F
+    length = head[1] & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > MAX_CLIENT_FRAME:
+        raise ConnectionError("WebSocket frame too large")
+    mask = await reader.readexactly(4) if head[1] & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return opcode, payload
+
+class _StreamClient:
+    """One browser connection and its bounded send buffer"""
+
+    def __init__(self, writer, max_events):
+        self.writer = writer
+        self.latest = {}                        # (kind, key) -> newest message not yet sent
+        self.events = deque(maxlen=max_events)  # Order status and fill messages not yet sent
+        self.dropped = 0                        # Messages skipped because the client fell behind
+        self.ready = asyncio.Event()
+        self.watching = None                    # Symbol the page asked to watch
+        self.pinned = None                      # Symbol whose quote stream this client holds
+
+    def push(self, latest, events):
+        """Queue one frame's updates, replacing anything this client has not been sent yet"""
+        for key, message in latest.items():
+            if key in self.latest:
+                self.dropped += 1
+            self.latest[key] = message
+        for message in events:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(message)
+        if self.latest or self.events:
+            self.ready.set()
+
+    def take(self):
+        """
+        Empty the buffer
+        Returns: list of messages (events in order, then the latest values)
+        """
+        messages = list(self.events) + list(self.latest.values())
+        self.events.clear()
+        self.latest = {}
+        self.ready.clear()
+        return messages
+
+class LiveStream:
+    """Pushes coalesced IB updates to every connected WebSocket client (IB loop thread)"""
+
+    def __init__(self, ib_connector, frame_interval=FRAME_INTERVAL, max_events=MAX_EVENTS):
+        self.ib = ib_connector
+        self.frame_interval = frame_interval
+        self.max_events = max_events
+        self.clients = set()
+        self._ticked = set()   # Symbols that ticked this frame
+        self._account = {}     # Account tag -> message, latest this frame
+        self._events = []      # Order status and fill messages this frame
+        self._connected = None
+        self._task = None
+
+    def start(self):
+        """Subscribe to the connector's events and start the frame loop"""
+        if self._task is not None:
+            return
+        self.ib.quote_cache.listeners.append(self._on_quotes)
+        self.ib.ib.accountValueEvent += self._on_account_value
+        self.ib.ib.orderStatusEvent += self._on_order_status
+        self.ib.ib.execDetailsEvent += self._on_exec_details
+        self._task = asyncio.ensure_future(self._run())
+
+    async def serve(self, reader, writer, key):
+        """Complete the upgrade and stream to one client until it disconnects"""
+        writer.write(handshake_response(key))
+        client = _StreamClient(writer, self.max_events)
+        client.push(self._snapshot(), [])
+        self.clients.add(client)
+        sender = asyncio.ensure_future(self._send_loop(client))
+        try:
+            await self._receive_loop(reader, writer, client)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            self._unwatch(client)
+            if client.dropped:
+                print(f"Web client closed ({client.dropped} stale updates skipped)")
+
+    async def _send_loop(self, client):
+        """Write whatever is buffered, one frame at a time; a slow socket just coalesces more"""
+        try:
+            while True:
+                await client.ready.wait()
+                client.writer.write(encode_frame(json.dumps(client.take()).encode()))
+                await client.writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _receive_loop(self, reader, writer, client):
+        """Answer pings and close frames, and handle watch requests"""
+        while True:
+            opcode, payload = await read_frame(reader)
+            if opcode == OP_CLOSE:
+                writer.write(encode_frame(payload[:2], OP_CLOSE))
+                return
+            if opcode == OP_PING:
+                writer.write(encode_frame(payload, OP_PONG))
+            elif opcode == OP_TEXT:
+                self._on_client_message(client, payload)
+
+    def _on_client_message(self, client, payload):
+        """{"type": "watch", "symbol": ...} streams quotes for the page's ticker"""
+        try:
+            message = json.loads(payload)
+            symbol = str(message.get("symbol", "")).strip().upper()
+        except (ValueError, AttributeError):
+            return
+        if message.get("type") != "watch" or not symbol.isalnum() or len(symbol) > 12 \
+                or symbol == client.watching or not self.ib.is_connected():
+            return
+        # Pinned, not active: pages never take each other's (or an order's) quote stream away
+        self._unwatch(client)
+        client.watching = symbol
+        asyncio.ensure_future(self._watch(client, symbol))
+
+    async def _watch(self, client, symbol):
+        """Pin a client's watched symbol and send its latest quote"""
+        try:
+            await self.ib.pin_quote_async(symbol, timeout=0)
+        except Exception as e:
+            print(f"Error watching {symbol}: {e}")
+            if client.watching == symbol:
+                client.watching = None
+            return
+        if client.watching != symbol or client not in self.clients:
+            # The page moved on (or went away) while the contract was looked up
+            self.ib.unpin_quote(symbol)
+            return
+        client.pinned = symbol
+        message = self._quote_message(symbol)
+        if message is not None:
+            client.push({("quote", symbol): message}, [])
+
+    def _unwatch(self, client):
+        """Release the client's quote stream"""
+        client.watching = None
+        if client.pinned is not None:
+            self.ib.unpin_quote(client.pinned)
+            client.pinned = None
+
+    async def _run(self):
+        """Flush once per frame"""
+        while True:
+            await asyncio.sleep(self.frame_interval)
+            try:
+                self._flush()
+            except Exception as e:
+                print(f"Error streaming updates: {e}")
+
+    def _flush(self):
+        """Hand this frame's coalesced updates to every client"""
+        connected = self.ib.is_connected()
+        latest = {}
+        if connected != self._connected:
+            self._connected = connected
+            latest[("connection",)] = {"type": "connection", "connected": connected}
+        for symbol in self._ticked:
+            message = self._quote_message(symbol)
+            if message is not None:
+                latest[("quote", symbol)] = message
+        for tag, message in self._account.items():
+            latest[("account", tag)] = message
+        events = self._events
+        self._ticked = set()
+        self._account = {}
+        self._events = []
+        if latest or events:
+            for client in self.clients:
+                client.push(latest, events)
+
+    def _snapshot(self):
+        """Current state for a newly connected client"""
+        connected = self.ib.is_connected()
+        latest = {("connection",): {"type": "connection", "connected": connected}}
+        if not connected:
+            return latest
+        for symbol in list(self.ib.quote_cache.quotes):
+            message = self._quote_message(symbol)
+            if message is not None:
+                latest[("quote", symbol)] = message
+        for tag in ACCOUNT_TAGS:
+            value = self.ib.account_state.get_value(tag)
+            if value is not None:
+                latest[("account", tag)] = {"type": "account", "tag": tag, "value": value}
+        for trade in self.ib.ib.openTrades():
+            latest[("order", trade.order.orderId)] = self._order_message(trade)
+        return latest
+
+    def _quote_message(self, symbol):
+        quote = self.ib.quote_cache.get(symbol)
+        if quote is None or quote.price() is None:
+            return None
+        return {"type": "quote", "symbol": symbol, "price": quote.price(), "last": quote.last,
+                "bid": quote.bid, "ask": quote.ask, "time": quote.updated}
+
+    def _order_message(self, trade):
+        status = trade.orderStatus
+        message = {"type": "order", "orderId": trade.order.orderId, "symbol": trade.contract.symbol,
+                   "action": trade.order.action, "orderType": trade.order.orderType,
+                   "quantity": trade.order.totalQuantity, "status": status.status,
+                   "filled": status.filled, "remaining": status.remaining,
+                   "avgFillPrice": status.avgFillPrice}
+        if trade.order.orderType == 'STP':
+            message["stopPrice"] = trade.order.auxPrice
+        return message
+
+    def _on_quotes(self, symbols):
+        if self.clients:
+            self._ticked |= symbols
+
+    def _on_account_value(self, value):
+        if self.clients and value.tag in ACCOUNT_TAGS and value.currency == 'USD' \
+                and value.account == self.ib.account_state.account:
+            try:
+                self._account[value.tag] = {"type": "account", "tag": value.tag, "value": float(value.value)}
+            except ValueError:
+                pass
+
+    def _on_order_status(self, trade):
+        if self.clients:
+            self._events.append(self._order_message(trade))
+
+    def _on_exec_details(self, trade, fill):
+        if self.clients:
+            execution = fill.execution
+            self._events.append({"type": "fill", "orderId": execution.orderId,
+                                 "symbol": fill.contract.symbol, "side": execution.side,
+                                 "shares": execution.shares, "price": execution.price,
+                                 "execId": execution.execId, "time": execution.time.timestamp()})
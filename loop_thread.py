@@ -0,0 +1,46 @@
+"""
+Event Loop Thread Module
+Runs an asyncio event loop on a dedicated background thread
+"""
+import asyncio
+import threading
+
+class EventLoopThread:
+    """asyncio event loop running forever on its own daemon thread"""
+
+    def __init__(self, name="ib-event-loop"):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        """Thread body: own the loop and run it until stopped"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def in_loop_thread(self):
+        """Check if the caller is running on the loop thread"""
+        return threading.current_thread() is self.thread
+
+    def submit(self, coro):
+        """
+        Schedule a coroutine on the loop from any thread
+        Returns: concurrent.futures.Future
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the loop and block the calling thread for its result"""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("Blocking call made from the event loop thread")
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, func, *args):
+        """Run a plain callable on the loop thread"""
+        self.loop.call_soon_threadsafe(func, *args)
+
+    def stop(self):
+        """Stop the loop and wait for the thread to exit"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2)
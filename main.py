@@ -1,43 +1,152 @@
 """
 IB Order Panel - Main Entry Point
 Modular version of the Interactive Brokers trading panel application
+
+The window is built and painted first; the IB modules (ib_insync and its
+dependencies) are imported on a background thread and the connector is
+attached to the window once they are ready.
 """
-from config import load_config, save_config
-from toast import ToastNotification
-from ib_connector import IBConnector
-from gui.main_window import MainWindow
+import argparse
+import asyncio
+import threading
+from concurrent.futures import Future
+from startup_profile import StartupProfiler
+from config import load_config, save_config, flush_config
+
+def _load_ib_modules(simulate):
+    """
+    Import the IB modules (slow: ib_insync, eventkit, nest_asyncio...)
+    Returns: dict of name -> class or factory function
+    """
+    from ib_connector import connector_from_config
+    from connection_supervisor import ConnectionSupervisor
+    from prefetcher import WatchlistPrefetcher
+    modules = {
+        "connector_from_config": connector_from_config,
+        "ConnectionSupervisor": ConnectionSupervisor,
+        "WatchlistPrefetcher": WatchlistPrefetcher
+    }
+    if simulate:
+        from sim_gateway import SimulatedGateway
+        modules["SimulatedGateway"] = SimulatedGateway
+    return modules
+
+def _load_in_background(simulate):
+    """
+    Start importing the IB modules on a daemon thread
+    Returns: concurrent.futures.Future with the _load_ib_modules result
+    """
+    future = Future()
+
+    def load():
+        try:
+            # eventkit grabs the thread's event loop at import time, and a plain thread has none
+            asyncio.set_event_loop(asyncio.new_event_loop())
+            future.set_result(_load_ib_modules(simulate))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=load, name="ib-import", daemon=True).start()
+    return future
+
+def _create_connector(modules, config, simulate):
+    """
+    Build the connector, connection supervisor and watchlist prefetcher
+    Returns: (ib_connector, supervisor, prefetcher)
+    """
+    # Real TWS/IB Gateway sessions, or fake ones sharing one simulated gateway
+    ib_factory = None
+    if simulate:
+        ib_factory = modules["SimulatedGateway"]().create_ib
+        print("Running against the simulated gateway")
+
+    # Create IB connector
+    ib_connector = modules["connector_from_config"](config, ib_factory)
+
+    # Connection runs in the background so the window stays responsive
+    port = int(config.get("port", "4001"))
+    supervisor = modules["ConnectionSupervisor"](ib_connector, port)
+
+    # Watchlist symbols are subscribed and warmed after every connect
+    prefetcher = modules["WatchlistPrefetcher"](ib_connector)
+    supervisor.add_connected_callback(lambda: prefetcher.prefetch_async(config.get("watchlist", [])))
+    return ib_connector, supervisor, prefetcher
 
 def main():
     """Main entry point for the application"""
+    parser = argparse.ArgumentParser(description="IB Order Panel")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Run against the in-process simulated gateway instead of TWS/IB Gateway")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print import times and a startup phase breakdown")
+    args = parser.parse_args()
+
+    profiler = StartupProfiler(enabled=args.profile_startup)
+    profiler.install()
+
     # Load configuration
     config = load_config()
-    
-    # Create IB connector
-    ib_connector = IBConnector()
-    
-    # Initial connection
-    port = int(config.get("port", "4001"))
-    ib_connector.connect(port)
-    
-    # Create main window
-    main_window = MainWindow(config, save_config, ib_connector, None)
-    
+    profiler.mark("config loaded")
+
+    # IB modules load while the window is built and painted
+    ib_modules = _load_in_background(args.simulate)
+
+    from toast import ToastNotification
+    from gui.main_window import MainWindow
+    from gui.async_bridge import FutureDispatcher
+    profiler.mark("GUI modules imported")
+
+    # Create main window (the connector is attached once the IB modules are loaded)
+    main_window = MainWindow(config, save_config, None, None)
+
     # Create toast notification system
     toast = ToastNotification(main_window.root)
-    
+
     # Update references
     main_window.toast = toast
-    ib_connector.toast = toast
     main_window.trading_tab.toast = toast
     main_window.settings_tab.toast = toast
-    
+    main_window.diagnostics_tab.toast = toast
+    profiler.mark("window built")
+
+    def on_first_map(event):
+        if event.widget is main_window.root:
+            main_window.root.unbind('<Map>')
+            profiler.mark("window mapped")
+    main_window.root.bind('<Map>', on_first_map)
+
+    state = {}
+
+    def on_ib_modules(modules, error):
+        if error:
+            print(f"Failed to load IB modules: {error}")
+            toast.show("Error", f"Failed to load IB modules: {error}", "error")
+            return
+        profiler.mark("IB modules imported")
+        ib_connector, supervisor, prefetcher = _create_connector(modules, config, args.simulate)
+        ib_connector.toast = toast
+        main_window.attach_connector(ib_connector, supervisor, prefetcher)
+        state.update(ib_connector=ib_connector, supervisor=supervisor)
+
+        # Start connecting
+        supervisor.start()
+        profiler.mark("connector attached, connecting")
+        profiler.uninstall()
+        profiler.report()
+
+    FutureDispatcher(main_window.root).watch(ib_modules, on_ib_modules)
+
     # Run the application
     try:
         main_window.run()
     finally:
         # Cleanup
-        ib_connector.disconnect()
+        if "supervisor" in state:
+            state["supervisor"].stop()
+            state["ib_connector"].disconnect()
+            if state["ib_connector"].journal is not None:
+                state["ib_connector"].journal.close()
+        flush_config()
 
 if __name__ == "__main__":
     main()
-
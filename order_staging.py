@@ -0,0 +1,37 @@
+"""
+Order Staging Module
+Holds a fully built order group for the current order form so the
+place-order hotkey only has to transmit it
+"""
+import time
+
+class StagedOrder:
+    """An order group built ahead of time: contract, legs, prices and reserved IDs"""
+
+    def __init__(self, ticker, qty, stop_price, entry_price, action, order_type,
+                 contract, orders, details, connection_id):
+        self.ticker = ticker
+        self.qty = qty
+        self.stop_price = stop_price
+        self.entry_price = entry_price
+        self.action = action
+        self.order_type = order_type
+        self.contract = contract
+        self.orders = orders
+        self.details = details
+        self.connection_id = connection_id  # Reserved order IDs are only valid on this connection
+        self.built_at = time.time()
+
+    @property
+    def signature(self):
+        """The form values this group was built from"""
+        return (self.ticker, self.qty, self.stop_price, self.entry_price, self.action, self.order_type)
+
+    @property
+    def first_order_id(self):
+        """Lowest reserved order ID in the group"""
+        return min(order.orderId for order in self.orders)
+
+    def matches(self, ticker, qty, stop_price, entry_price, action, order_type):
+        """Check if this group was built for exactly these form values"""
+        return self.signature == (ticker.upper(), qty, stop_price, entry_price, action, order_type)
@@ -0,0 +1,37 @@
+"""
+Position Sizing Module
+Risk-based order sizing shared by the trading tab and the headless entry points
+"""
+
+def calculate_position_size(current_price, stop_price, net_liq_value, risk_pct, action='BUY', position_qty=0):
+    """
+    Size an order so that being stopped out loses risk_pct of net liquidation
+    Returns: dict with quantity, trade_value, trade_pct, total_value and total_pct,
+             or None if the parameters are invalid (risk outside 0-100%, no net
+             liquidation value, or the stop on the wrong side of the price)
+    """
+    if not (0 < risk_pct <= 100 and net_liq_value > 0):
+        return None
+
+    # Calculate risk per share
+    if action == 'BUY':
+        risk_per_share = current_price - stop_price
+    else:  # SELL
+        risk_per_share = stop_price - current_price
+    if risk_per_share <= 0:
+        return None
+
+    risk_amount = net_liq_value * (risk_pct / 100)
+    quantity = int(risk_amount / risk_per_share)
+
+    # Trade size and the total position after the trade, as a share of net liquidation
+    trade_value = quantity * current_price
+    total_qty = position_qty + quantity if action == 'BUY' else position_qty - quantity
+    total_value = abs(total_qty) * current_price
+    return {
+        'quantity': quantity,
+        'trade_value': trade_value,
+        'trade_pct': trade_value / net_liq_value * 100,
+        'total_value': total_value,
+        'total_pct': total_value / net_liq_value * 100
+    }
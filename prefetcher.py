@@ -0,0 +1,95 @@
+"""
+Prefetcher Module
+Warms the contract cache, quote subscription and intraday bars of every
+watchlist symbol so clicking a watchlist button renders from memory
+"""
+import asyncio
+import itertools
+
+PRIORITY_HOVER = 0      # Mouse is over the symbol's button: likely the next click
+PRIORITY_WATCHLIST = 1  # Everything else on the watchlist
+
+class WatchlistPrefetcher:
+    """Priority queue of symbols warmed by a few workers on the IB loop thread"""
+
+    def __init__(self, ib_connector, workers=3, quote_timeout=5):
+        self.ib = ib_connector
+        self.workers = workers
+        self.quote_timeout = quote_timeout  # Seconds to wait for a symbol's first tick
+        self.warm = {}  # Symbol -> connection_id it was warmed on
+        self._queue = None
+        self._queued = {}  # Symbol -> best priority waiting in the queue
+        self._in_progress = set()
+        self._sequence = itertools.count()
+        self._tasks = []
+
+    def prefetch(self, symbols):
+        """Queue symbols for warming (callable from any thread)"""
+        self.ib.loop_thread.call_soon(self._enqueue_all, list(symbols))
+
+    def boost(self, symbol):
+        """Warm a symbol ahead of the rest of the queue (callable from any thread)"""
+        if symbol:
+            self.ib.loop_thread.call_soon(self._enqueue, symbol.upper(), PRIORITY_HOVER)
+
+    async def prefetch_async(self, symbols):
+        """Subscribe the watchlist and queue its symbols for warming (loop thread)"""
+        await self.ib.set_watchlist_async(symbols)
+        self._enqueue_all(symbols)
+
+    def is_warm(self, symbol):
+        """Check if a symbol was warmed on the current connection"""
+        return self.warm.get(symbol.upper()) == self.ib.connection_id
+
+    def _enqueue_all(self, symbols):
+        for symbol in symbols:
+            if symbol:
+                self._enqueue(symbol.upper(), PRIORITY_WATCHLIST)
+
+    def _enqueue(self, symbol, priority):
+        """Queue a symbol unless it is warm, in progress or already queued as high (loop thread only)"""
+        if self.is_warm(symbol) or symbol in self._in_progress:
+            return
+        if self._queued.get(symbol, priority + 1) <= priority:
+            return
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._queued[symbol] = priority
+        self._queue.put_nowait((priority, next(self._sequence), symbol))
+
+    async def _worker(self):
+        """Take the most urgent symbol off the queue and warm it, forever"""
+        while True:
+            priority, _, symbol = await self._queue.get()
+            # A boosted symbol leaves a stale low-priority entry behind
+            if self._queued.get(symbol) != priority:
+                continue
+            del self._queued[symbol]
+            if self.is_warm(symbol) or not self.ib.is_connected():
+                continue
+            # Dropped from the watchlist while it waited
+            if symbol not in self.ib.quote_cache.watchlist:
+                continue
+            self._in_progress.add(symbol)
+            try:
+                await self._warm(symbol)
+            except Exception as e:
+                print(f"Error prefetching {symbol}: {e}")
+            finally:
+                self._in_progress.discard(symbol)
+
+    async def _warm(self, symbol):
+        """
+        Qualify the contract, open the quote stream and backfill intraday bars
+        (positions need no warming: they come from the event-fed account index)
+        """
+        connection_id = self.ib.connection_id
+        contract = await self.ib.get_contract_async(symbol)
+        quote_cache = self.ib.quote_cache
+        quote_cache.subscribe(symbol, contract)
+        await asyncio.gather(
+            quote_cache.wait_for_price(symbol, self.quote_timeout),
+            self.ib.bar_store.ensure(symbol, contract)
+        )
+        self.warm[symbol] = connection_id
@@ -0,0 +1,180 @@
+"""
+Quote Cache Module
+Keeps streaming market data subscriptions open and serves the latest
+prices from memory
+"""
+import asyncio
+import time
+
+def _valid_price(value):
+    """Check that a tick value is a usable price (not None, NaN or <= 0)"""
+    return value is not None and value == value and value > 0
+
+class Quote:
+    """Latest streaming prices for one symbol"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.last = None
+        self.bid = None
+        self.ask = None
+        self.close = None
+        self.market = None
+        self.updated = None  # time.time() of the last tick, None until the first one
+
+    def price(self):
+        """Best available price: market price, then last, then previous close"""
+        for value in (self.market, self.last, self.close):
+            if _valid_price(value):
+                return value
+        return None
+
+    def age(self):
+        """Seconds since the last tick, or None if no tick has arrived yet"""
+        if self.updated is None:
+            return None
+        return time.time() - self.updated
+
+class QuoteCache:
+    """Long-lived market data subscriptions for the active ticker and watchlist"""
+
+    def __init__(self, ib):
+        self.ib = ib
+        self.quotes = {}      # Symbol -> Quote
+        self.contracts = {}   # Symbol -> subscribed Contract
+        self.watchlist = set()
+        self.active = None
+        self.pins = {}        # Symbol -> holders streaming it without being the active ticker
+        self._waiters = {}    # Symbol -> futures waiting for the first usable price
+        self.listeners = []   # Callbacks taking the set of symbols that just ticked
+        self.ib.pendingTickersEvent += self._on_pending_tickers
+
+    def bind(self, ib):
+        """Move the cache to another IB session (subscriptions need a resubscribe())"""
+        if ib is self.ib:
+            return
+        if self.ib.isConnected():
+            # Leaving a live session: stop its streams rather than pay for two
+            for contract in self.contracts.values():
+                self.ib.cancelMktData(contract)
+        self.ib.pendingTickersEvent -= self._on_pending_tickers
+        self.ib = ib
+        self.ib.pendingTickersEvent += self._on_pending_tickers
+
+    def get(self, symbol):
+        """Get the cached Quote for a symbol, or None if not subscribed"""
+        return self.quotes.get(symbol)
+
+    async def wait_for_price(self, symbol, timeout):
+        """
+        Wait for a usable price on a subscribed symbol
+        Returns: price or None if nothing arrived within timeout seconds
+        """
+        quote = self.quotes.get(symbol)
+        if quote is None:
+            return None
+        if quote.price() is not None:
+            return quote.price()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(symbol, []).append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(symbol, [])
+            if waiter in waiters:
+                waiters.remove(waiter)
+
+    def is_subscribed(self, symbol):
+        """Check if a streaming subscription is open for a symbol"""
+        return symbol in self.contracts
+
+    def subscribe(self, symbol, contract):
+        """Open a streaming subscription (no-op if already open)"""
+        if symbol in self.contracts:
+            return
+        self.contracts[symbol] = contract
+        self.quotes.setdefault(symbol, Quote(symbol))
+        self.ib.reqMktData(contract, '', False, False)
+
+    def unsubscribe(self, symbol):
+        """Close the streaming subscription for a symbol"""
+        contract = self.contracts.pop(symbol, None)
+        self.quotes.pop(symbol, None)
+        if contract is not None:
+            try:
+                self.ib.cancelMktData(contract)
+            except Exception as e:
+                print(f"Error cancelling market data for {symbol}: {e}")
+
+    def resubscribe(self):
+        """Re-request every open subscription (after a reconnect)"""
+        for contract in self.contracts.values():
+            self.ib.reqMktData(contract, '', False, False)
+
+    def set_active(self, symbol, contract):
+        """Make a symbol the active ticker, releasing the previous one if unused"""
+        previous = self.active
+        self.active = symbol
+        self.subscribe(symbol, contract)
+        if previous and not self._in_use(previous):
+            self.unsubscribe(previous)
+
+    def pin(self, symbol, contract):
+        """Hold a subscription open without taking the active slot (pair with unpin)"""
+        self.pins[symbol] = self.pins.get(symbol, 0) + 1
+        self.subscribe(symbol, contract)
+
+    def unpin(self, symbol):
+        """Release one pin, closing the subscription once nothing else uses it"""
+        count = self.pins.get(symbol, 0) - 1
+        if count > 0:
+            self.pins[symbol] = count
+            return
+        self.pins.pop(symbol, None)
+        if not self._in_use(symbol):
+            self.unsubscribe(symbol)
+
+    def _in_use(self, symbol):
+        """Check if the active ticker, the watchlist or a pin still needs a symbol"""
+        return symbol == self.active or symbol in self.watchlist or symbol in self.pins
+
+    def set_watchlist(self, contracts):
+        """
+        Keep exactly the given watchlist symbols subscribed
+        contracts: dict of symbol -> Contract
+        """
+        old_watchlist = self.watchlist
+        self.watchlist = set(contracts)
+        for symbol, contract in contracts.items():
+            self.subscribe(symbol, contract)
+        for symbol in old_watchlist - self.watchlist:
+            if not self._in_use(symbol):
+                self.unsubscribe(symbol)
+
+    def _on_pending_tickers(self, tickers):
+        """Copy new ticks from ib_insync Ticker objects into the cache"""
+        now = time.time()
+        updated = set()
+        for ticker in tickers:
+            quote = self.quotes.get(ticker.contract.symbol)
+            if quote is None:
+                continue
+            updated.add(quote.symbol)
+            for field in ('last', 'bid', 'ask', 'close'):
+                value = getattr(ticker, field)
+                if _valid_price(value):
+                    setattr(quote, field, value)
+            market = ticker.marketPrice()
+            if _valid_price(market):
+                quote.market = market
+            quote.updated = now
+            price = quote.price()
+            if price is not None:
+                for waiter in self._waiters.pop(quote.symbol, []):
+                    if not waiter.done():
+                        waiter.set_result(price)
+        if updated:
+            for listener in self.listeners:
+                listener(updated)
@@ -0,0 +1,433 @@
+"""
+Simulated Gateway Module
+In-process stand-in for TWS/IB Gateway: fake IB sessions that serve quotes,
+historical bars, account values and positions, and simulate fills with
+injectable latency and partial fills. Used for offline runs and benchmarks.
+"""
+import asyncio
+import datetime
+import random
+import zlib
+from eventkit import Event
+from ib_insync import (
+    AccountValue, BarData, BarDataList, CommissionReport, ContractDetails,
+    Execution, Fill, OrderStatus, Position, Stock, Ticker, Trade
+)
+from ib_insync.util import dataclassUpdate
+
+DEFAULT_PRICES = {
+    "AAPL": 190.0, "TSLA": 250.0, "NVDA": 120.0, "MSFT": 420.0, "GOOGL": 170.0,
+    "AMZN": 185.0, "META": 500.0, "SPY": 550.0, "QQQ": 480.0, "IWM": 210.0
+}
+
+class SimulatedGateway:
+    """Shared market, account and order state behind one or more FakeIB sessions"""
+
+    def __init__(self, prices=None, account="DU0000001", net_liquidation=100000.0,
+                 cash=100000.0, buying_power=400000.0, positions=None, seed=1,
+                 spread=0.02, quote_interval=0.25, connect_latency=0.0, contract_latency=0.0,
+                 history_latency=0.0, ack_latency=0.0, fill_latency=0.0, partial_fills=1,
+                 commission_per_share=0.005):
+        self.prices = dict(DEFAULT_PRICES, **(prices or {}))
+        self.account = account
+        self.account_values = {
+            "NetLiquidation": net_liquidation,
+            "CashBalance": cash,
+            "BuyingPower": buying_power
+        }
+        self.positions = dict(positions or {})  # Symbol -> shares
+        self.random = random.Random(seed)
+        self.spread = spread
+        self.quote_interval = quote_interval  # Seconds between simulated ticks (None = only on tick())
+        self.connect_latency = connect_latency
+        self.contract_latency = contract_latency
+        self.history_latency = history_latency
+        self.ack_latency = ack_latency        # placeOrder -> Submitted/PreSubmitted
+        self.fill_latency = fill_latency      # Between partial fills of a market order
+        self.partial_fills = partial_fills    # Number of executions a market order is split into
+        self.commission_per_share = commission_per_share
+        self.sessions = []
+        self.fills = []                       # Every simulated Fill, oldest first
+        self.api_calls = {}                   # API method name -> call count
+        self._exec_seq = 0
+        self._perm_id = 1000
+        self._quote_task = None
+
+    def create_ib(self):
+        """Factory for IBConnector: a new fake IB session on this gateway"""
+        session = FakeIB(self)
+        self.sessions.append(session)
+        return session
+
+    def count(self, name):
+        """Record an API call (used for round-trip counts in benchmarks)"""
+        self.api_calls[name] = self.api_calls.get(name, 0) + 1
+
+    def con_id(self, symbol):
+        """Stable fake conId for a symbol"""
+        return zlib.crc32(symbol.encode()) % 10000000 + 1
+
+    def price(self, symbol):
+        """Current simulated last price for a symbol"""
+        if symbol not in self.prices:
+            self.prices[symbol] = round(self.random.uniform(20, 400), 2)
+        return self.prices[symbol]
+
+    def tick(self):
+        """Move every subscribed symbol one random step and publish it"""
+        symbols = set()
+        for session in self.sessions:
+            symbols.update(session.tickers)
+        for symbol in symbols:
+            price = self.price(symbol)
+            self.prices[symbol] = round(max(0.01, price * (1 + self.random.gauss(0, 0.0005))), 2)
+        for session in self.sessions:
+            session._publish_ticks()
+
+    async def _run_quotes(self):
+        """Background tick generator while any session is connected"""
+        while any(session.connected for session in self.sessions):
+            await asyncio.sleep(self.quote_interval)
+            self.tick()
+        self._quote_task = None
+
+    def _session_connected(self):
+        """Start the tick generator with the first connected session"""
+        if self.quote_interval and self._quote_task is None:
+            self._quote_task = asyncio.ensure_future(self._run_quotes())
+
+    def restart(self):
+        """Drop every session, like TWS restarting overnight"""
+        for session in list(self.sessions):
+            if session.connected:
+                session.disconnect()
+
+    def next_exec_id(self):
+        """Unique execution ID"""
+        self._exec_seq += 1
+        return f"SIM.{self._exec_seq:08d}"
+
+    def next_perm_id(self):
+        """Unique permanent order ID"""
+        self._perm_id += 1
+        return self._perm_id
+
+class _FakeClient:
+    """The bits of ib_insync.Client the connector uses"""
+
+    def __init__(self):
+        self._req_id = 1
+
+    def getReqId(self):
+        """Reserve the next order/request ID"""
+        req_id = self._req_id
+        self._req_id += 1
+        return req_id
+
+class FakeIB:
+    """Drop-in for ib_insync.IB covering the API this application uses"""
+
+    def __init__(self, gateway):
+        self.gateway = gateway
+        self.client = _FakeClient()
+        self.connected = False
+        self.client_id = None
+        self.tickers = {}   # Symbol -> Ticker
+        self.bar_lists = {}  # Symbol -> list of keepUpToDate BarDataLists
+        self.trades = []
+        self._fills = {}  # execId -> Fill seen by this session
+        self._held = []  # Placed with transmit=False, waiting for the transmitting leg
+
+        self.connectedEvent = Event('connectedEvent')
+        self.disconnectedEvent = Event('disconnectedEvent')
+        self.pendingTickersEvent = Event('pendingTickersEvent')
+        self.accountValueEvent = Event('accountValueEvent')
+        self.positionEvent = Event('positionEvent')
+        self.orderStatusEvent = Event('orderStatusEvent')
+        self.execDetailsEvent = Event('execDetailsEvent')
+        self.commissionReportEvent = Event('commissionReportEvent')
+        self.errorEvent = Event('errorEvent')
+
+    # ---------- Connection ----------
+
+    def isConnected(self):
+        return self.connected
+
+    async def connectAsync(self, host='127.0.0.1', port=7497, clientId=1, timeout=4, readonly=False, account=''):
+        self.gateway.count('connect')
+        await asyncio.sleep(self.gateway.connect_latency)
+        for session in self.gateway.sessions:
+            if session is not self and session.connected and session.client_id == clientId:
+                raise ConnectionError(f"clientId {clientId} already in use")
+        self.client_id = clientId
+        self.connected = True
+        self.gateway._session_connected()
+        self._download_executions()
+        self.connectedEvent.emit()
+        return self
+
+    def disconnect(self):
+        if not self.connected:
+            return
+        self.connected = False
+        self.tickers = {}
+        self.bar_lists = {}
+        self.disconnectedEvent.emit()
+
+    # ---------- Account ----------
+
+    def managedAccounts(self):
+        return [self.gateway.account]
+
+    def accountValues(self, account=''):
+        gateway = self.gateway
+        return [AccountValue(gateway.account, tag, str(value), 'USD', '')
+                for tag, value in gateway.account_values.items()]
+
+    def positions(self, account=''):
+        gateway = self.gateway
+        return [self._position(symbol, qty) for symbol, qty in gateway.positions.items() if qty]
+
+    def _position(self, symbol, qty):
+        return Position(self.gateway.account, self._contract(symbol), qty, self.gateway.price(symbol))
+
+    # ---------- Contracts ----------
+
+    def _contract(self, symbol):
+        return Stock(symbol, 'SMART', 'USD', conId=self.gateway.con_id(symbol), primaryExchange='NASDAQ')
+
+    async def reqContractDetailsAsync(self, contract):
+        self.gateway.count('reqContractDetails')
+        await asyncio.sleep(self.gateway.contract_latency)
+        return [ContractDetails(contract=self._contract(contract.symbol), minTick=0.01)]
+
+    async def qualifyContractsAsync(self, *contracts):
+        self.gateway.count('qualifyContracts')
+        await asyncio.sleep(self.gateway.contract_latency)
+        for contract in contracts:
+            contract.conId = self.gateway.con_id(contract.symbol)
+            contract.primaryExchange = 'NASDAQ'
+        return list(contracts)
+
+    # ---------- Market data ----------
+
+    def reqMktData(self, contract, genericTickList='', snapshot=False, regulatorySnapshot=False, mktDataOptions=None):
+        self.gateway.count('reqMktData')
+        ticker = self.tickers.get(contract.symbol)
+        if ticker is None:
+            ticker = Ticker(contract=contract)
+            ticker.close = self.gateway.price(contract.symbol)
+            self._quote(contract.symbol, ticker, datetime.datetime.now(datetime.timezone.utc))
+            self.tickers[contract.symbol] = ticker
+            # First tick arrives on the next loop iteration, like a real subscription
+            asyncio.get_event_loop().call_soon(self._emit_tickers, {ticker})
+        return ticker
+
+    def cancelMktData(self, contract):
+        self.gateway.count('cancelMktData')
+        self.tickers.pop(contract.symbol, None)
+
+    def ticker(self, contract):
+        return self.tickers.get(contract.symbol)
+
+    def _publish_ticks(self):
+        """Refresh subscribed tickers and streaming bars from gateway prices"""
+        if not self.connected:
+            return
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for symbol, ticker in self.tickers.items():
+            self._quote(symbol, ticker, now)
+        for symbol, bar_lists in self.bar_lists.items():
+            price = self.gateway.price(symbol)
+            for bars in bar_lists:
+                bar = bars[-1]
+                bar.high = max(bar.high, price)
+                bar.low = min(bar.low, price)
+                bar.close = price
+                bars.updateEvent.emit(bars, False)
+        self._emit_tickers(set(self.tickers.values()))
+
+    def _quote(self, symbol, ticker, now):
+        """Set a ticker's last/bid/ask from the gateway price"""
+        price = self.gateway.price(symbol)
+        half_spread = self.gateway.spread / 2
+        ticker.last = price
+        ticker.bid = round(price - half_spread, 2)
+        ticker.ask = round(price + half_spread, 2)
+        ticker.time = now
+
+    def _emit_tickers(self, tickers):
+        if self.connected and tickers:
+            self.pendingTickersEvent.emit(tickers)
+
+    async def reqHistoricalDataAsync(self, contract, endDateTime='', durationStr='1 D', barSizeSetting='1 min',
+                                     whatToShow='TRADES', useRTH=True, formatDate=1, keepUpToDate=False,
+                                     chartOptions=None, timeout=60):
+        self.gateway.count('reqHistoricalData')
+        await asyncio.sleep(self.gateway.history_latency)
+        symbol = contract.symbol
+        price = self.gateway.price(symbol)
+        rng = random.Random(self.gateway.con_id(symbol))
+        start = datetime.datetime.combine(datetime.date.today(), datetime.time(9, 30))
+
+        bars = BarDataList()
+        bars.contract = contract
+        bars.keepUpToDate = keepUpToDate
+        walk = price
+        for minute in range(390):
+            move = rng.gauss(0, price * 0.001)
+            open_ = walk
+            walk = max(0.01, walk + move)
+            high = max(open_, walk) + abs(rng.gauss(0, price * 0.0005))
+            low = min(open_, walk) - abs(rng.gauss(0, price * 0.0005))
+            bars.append(BarData(
+                date=start + datetime.timedelta(minutes=minute),
+                open=round(open_, 2), high=round(high, 2), low=round(low, 2), close=round(walk, 2),
+                volume=rng.randint(1000, 50000), average=round((high + low) / 2, 2), barCount=rng.randint(10, 500)
+            ))
+        if keepUpToDate:
+            self.bar_lists.setdefault(symbol, []).append(bars)
+        return bars
+
+    def cancelHistoricalData(self, bars):
+        self.gateway.count('cancelHistoricalData')
+        bar_lists = self.bar_lists.get(bars.contract.symbol, [])
+        if bars in bar_lists:
+            bar_lists.remove(bars)
+
+    # ---------- Orders ----------
+
+    def placeOrder(self, contract, order):
+        self.gateway.count('placeOrder')
+        if not order.orderId:
+            order.orderId = self.client.getReqId()
+        order.permId = self.gateway.next_perm_id()
+        order.clientId = self.client_id
+        status = OrderStatus(orderId=order.orderId, status='PendingSubmit', remaining=order.totalQuantity)
+        trade = Trade(contract=contract, order=order, orderStatus=status, fills=[], log=[])
+        self.trades.append(trade)
+
+        self._held.append(trade)
+        if order.transmit:
+            # The transmitting leg releases itself and every held leg before it
+            loop = asyncio.get_event_loop()
+            for held in self._held:
+                loop.call_later(self.gateway.ack_latency, self._acknowledge, held)
+            self._held = []
+        return trade
+
+    def cancelOrder(self, order):
+        self.gateway.count('cancelOrder')
+        for trade in self.trades:
+            if trade.isActive() and (trade.order.orderId == order.orderId or trade.order.parentId == order.orderId):
+                self._set_status(trade, 'Cancelled')
+
+    def openTrades(self):
+        return [trade for trade in self.trades if trade.isActive()]
+
+    def fills(self):
+        return list(self._fills.values())
+
+    def _download_executions(self):
+        """
+        Like ib_insync's connect, fetch the whole day's executions; their commission
+        reports arrive afterwards and fill in the reports without any event
+        """
+        self.gateway.count('reqExecutions')
+        self._fills = {}
+        loop = asyncio.get_event_loop()
+        for fill in self.gateway.fills:
+            execution = fill.execution
+            self._fills[execution.execId] = Fill(fill.contract, execution, CommissionReport(), execution.time)
+            loop.call_later(self.gateway.fill_latency, self._late_commission, fill.commissionReport)
+
+    def _late_commission(self, report):
+        fill = self._fills.get(report.execId)
+        if self.connected and fill is not None:
+            dataclassUpdate(fill.commissionReport, report)
+
+    def _set_status(self, trade, status):
+        trade.orderStatus.status = status
+        trade.statusEvent.emit(trade)
+        self.orderStatusEvent.emit(trade)
+        if status == 'Cancelled':
+            trade.cancelledEvent.emit(trade)
+
+    def _acknowledge(self, trade):
+        """TWS accepted the order: market parents start filling, children wait for them"""
+        if not self.connected or trade.orderStatus.status != 'PendingSubmit':
+            return
+        order = trade.order
+        if order.parentId:
+            self._set_status(trade, 'PreSubmitted')
+        elif order.orderType == 'MKT':
+            self._set_status(trade, 'Submitted')
+            loop = asyncio.get_event_loop()
+            loop.call_later(self.gateway.fill_latency, self._fill_step, trade)
+        else:
+            self._set_status(trade, 'Submitted')
+
+    def _fill_step(self, trade):
+        """Execute the next partial fill of a market order"""
+        if not self.connected or not trade.isActive():
+            return
+        gateway = self.gateway
+        order = trade.order
+        total = order.totalQuantity
+        filled = trade.orderStatus.filled
+        chunk = max(1, int(total // max(1, gateway.partial_fills)))
+        qty = min(chunk, total - filled)
+        if len(trade.fills) == gateway.partial_fills - 1:
+            qty = total - filled
+
+        symbol = trade.contract.symbol
+        half_spread = gateway.spread / 2
+        price = round(gateway.price(symbol) + (half_spread if order.action == 'BUY' else -half_spread), 2)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        new_filled = filled + qty
+        avg_price = (trade.orderStatus.avgFillPrice * filled + price * qty) / new_filled
+
+        execution = Execution(
+            execId=gateway.next_exec_id(), time=now, acctNumber=gateway.account, exchange='SIM',
+            side='BOT' if order.action == 'BUY' else 'SLD', shares=qty, price=price,
+            permId=order.permId, clientId=self.client_id, orderId=order.orderId,
+            cumQty=new_filled, avgPrice=avg_price, orderRef=order.orderRef
+        )
+        report = CommissionReport(execId=execution.execId, commission=round(qty * gateway.commission_per_share, 4),
+                                  currency='USD')
+        fill = Fill(trade.contract, execution, report, now)
+        gateway.fills.append(fill)
+        self._fills[execution.execId] = fill
+        trade.fills.append(fill)
+
+        status = trade.orderStatus
+        status.filled = new_filled
+        status.remaining = total - new_filled
+        status.avgFillPrice = avg_price
+        status.lastFillPrice = price
+        self.execDetailsEvent.emit(trade, fill)
+        trade.fillEvent.emit(trade, fill)
+        self.commissionReportEvent.emit(trade, fill, report)
+        trade.commissionReportEvent.emit(trade, fill, report)
+
+        # Position and account follow the fill
+        signed = qty if order.action == 'BUY' else -qty
+        gateway.positions[symbol] = gateway.positions.get(symbol, 0) + signed
+        gateway.account_values["CashBalance"] -= signed * price
+        for session in gateway.sessions:
+            if session.connected:
+                session.positionEvent.emit(session._position(symbol, gateway.positions[symbol]))
+                session.accountValueEvent.emit(AccountValue(
+                    gateway.account, "CashBalance", str(gateway.account_values["CashBalance"]), 'USD', ''))
+
+        if status.remaining > 0:
+            self._set_status(trade, 'Submitted')
+            asyncio.get_event_loop().call_later(gateway.fill_latency, self._fill_step, trade)
+            return
+
+        self._set_status(trade, 'Filled')
+        trade.filledEvent.emit(trade)
+        # Attached exits go live once the parent is filled
+        for child in self.trades:
+            if child.order.parentId == order.orderId and child.orderStatus.status == 'PreSubmitted':
+                self._set_status(child, 'Submitted')
@@ -0,0 +1,73 @@
+"""
+Startup Profile Module
+Phase timings and per-module import times for --profile-startup
+"""
+import builtins
+import sys
+import threading
+import time
+
+class StartupProfiler:
+    """Records startup phases and, once installed, the self time of every import"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases = []   # (name, seconds since start, thread name)
+        self.imports = {}  # Top-level package -> self time in seconds
+        self._original_import = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def mark(self, phase):
+        """Record that a startup phase finished"""
+        if self.enabled:
+            self.phases.append((phase, time.perf_counter() - self.started, threading.current_thread().name))
+
+    def install(self):
+        """Start timing imports (no-op unless enabled)"""
+        if not self.enabled or self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        """Stop timing imports"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """__import__ wrapper charging each first-time import its own (not its children's) time"""
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            package = name.partition('.')[0]
+            with self._lock:
+                self.imports[package] = self.imports.get(package, 0.0) + elapsed - children
+
+    def report(self, top=15):
+        """Print the phase breakdown and the slowest imports"""
+        if not self.enabled:
+            return
+        print("Startup profile (ms since start):")
+        previous = 0.0
+        for phase, at, thread in self.phases:
+            print(f"  {at * 1000:8.1f}  (+{(at - previous) * 1000:7.1f})  {phase}  [{thread}]")
+            previous = at
+        print(f"Slowest imports (self time, top {top}):")
+        with self._lock:
+            slowest = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:top]
+        for package, seconds in slowest:
+            print(f"  {seconds * 1000:8.1f}  {package}")
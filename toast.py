@@ -1,117 +1,202 @@
 """
 Modern Toast Notification System
 Non-blocking toast notifications for the application
+
+Toast widgets are pooled and reused, at most max_visible are shown at once
+(the rest wait their turn), repeats of a visible or waiting message are merged
+into one toast with a count badge, and all showing, expiring and repositioning
+happens in one rate-limited pass on the Tk loop.
 """
+import time
 import tkinter as tk
+from collections import deque
+
+COLORS = {
+    "info": ("#5E81AC", "#D8DEE9"),
+    "success": ("#A3BE8C", "#2E3440"),
+    "warning": ("#EBCB8B", "#2E3440"),
+    "error": ("#BF616A", "#ECEFF4")
+}
+
+ICONS = {
+    "info": "ℹ",
+    "success": "✓",
+    "warning": "⚠",
+    "error": "✕"
+}
+
+class _Toast:
+    """One reusable toast widget"""
+
+    def __init__(self, master, on_close):
+        self.frame = tk.Frame(master, relief="flat", borderwidth=0, highlightthickness=1)
+
+        # Icon label
+        self.icon_label = tk.Label(self.frame, font=("Segoe UI", 16, "bold"))
+        self.icon_label.pack(side="left", padx=(10, 5), pady=10)
+
+        # Message frame
+        self.msg_frame = tk.Frame(self.frame)
+        self.msg_frame.pack(side="left", fill="both", expand=True, padx=(5, 10), pady=10)
+
+        # Title and repeat count
+        self.title_label = tk.Label(self.msg_frame, font=("Segoe UI", 10, "bold"), anchor="w")
+        self.badge_label = tk.Label(self.msg_frame, font=("Segoe UI", 9, "bold"), anchor="e")
+
+        # Message
+        self.msg_label = tk.Label(self.msg_frame, font=("Segoe UI", 9), anchor="w", wraplength=300)
+
+        # Close button
+        self.close_btn = tk.Label(self.frame, text="×", font=("Segoe UI", 16, "bold"), cursor="hand2")
+        self.close_btn.pack(side="right", padx=10)
+        self.close_btn.bind("<Button-1>", lambda e: on_close(self))
+
+        self.key = None
+        self.count = 0
+        self.expires_at = None  # time.monotonic(), or None for permanent
+        self.y = None           # Current placed y offset
+
+    def configure(self, title, message, msg_type):
+        """Show new content in this widget"""
+        bg_color, fg_color = COLORS.get(msg_type, COLORS["info"])
+        self.frame.config(bg=bg_color, highlightbackground=bg_color)
+        self.msg_frame.config(bg=bg_color)
+        self.icon_label.config(text=ICONS.get(msg_type, ICONS["info"]), bg=bg_color, fg=fg_color)
+        self.close_btn.config(bg=bg_color, fg=fg_color)
+        self.badge_label.config(bg=bg_color, fg=fg_color)
+        self.title_label.config(text=title, bg=bg_color, fg=fg_color)
+        self.msg_label.config(text=message, bg=bg_color, fg=fg_color)
+
+        self.title_label.pack_forget()
+        self.msg_label.pack_forget()
+        if title:
+            self.title_label.pack(fill="x")
+        self.msg_label.pack(fill="x")
+        self.set_count(1)
+
+    def set_count(self, count):
+        """Update the repeat badge (hidden for a single message)"""
+        self.count = count
+        if count > 1:
+            self.badge_label.config(text=f"×{count}")
+            self.badge_label.place(relx=1.0, y=0, anchor="ne")
+        else:
+            self.badge_label.place_forget()
+
+    def hide(self):
+        self.frame.place_forget()
+        self.key = None
+        self.y = None
 
 class ToastNotification:
     """Modern, non-blocking toast notification"""
-    def __init__(self, master):
+
+    def __init__(self, master, max_visible=4, max_waiting=50, repaint_interval=100):
         self.master = master
-        self.notifications = []
-        
+        self.max_visible = max_visible
+        self.repaint_interval = repaint_interval  # Milliseconds between layout/expiry passes
+        self.notifications = []                   # Visible toasts, top to bottom
+        self._pool = []                           # Hidden toasts ready for reuse
+        self._waiting = deque(maxlen=max_waiting)  # [key, title, message, msg_type, duration, count]
+        self._job = None
+        self._job_due = None
+        self._dirty = False
+
     def show(self, title, message, msg_type="info", duration=3000):
         """
-        Show a toast notification
+        Show a toast notification (cheap: the widgets update on the next pass)
         msg_type: 'info', 'success', 'warning', 'error'
         duration: milliseconds to display (0 = permanent)
         """
-        # Create notification frame
-        toast = tk.Frame(self.master, bg="#2E3440", relief="flat", borderwidth=0)
-        toast.config(highlightthickness=1)
-        
-        # Set color based on type
-        colors = {
-            "info": ("#5E81AC", "#D8DEE9"),
-            "success": ("#A3BE8C", "#2E3440"),
-            "warning": ("#EBCB8B", "#2E3440"),
-            "error": ("#BF616A", "#ECEFF4")
-        }
-        bg_color, fg_color = colors.get(msg_type, colors["info"])
-        toast.config(bg=bg_color, highlightbackground=bg_color)
-        
-        # Icon based on type
-        icons = {
-            "info": "ℹ",
-            "success": "✓",
-            "warning": "⚠",
-            "error": "✕"
-        }
-        icon = icons.get(msg_type, "ℹ")
-        
-        # Icon label
-        icon_label = tk.Label(
-            toast,
-            text=icon,
-            font=("Segoe UI", 16, "bold"),
-            bg=bg_color,
-            fg=fg_color
-        )
-        icon_label.pack(side="left", padx=(10, 5), pady=10)
-        
-        # Message frame
-        msg_frame = tk.Frame(toast, bg=bg_color)
-        msg_frame.pack(side="left", fill="both", expand=True, padx=(5, 10), pady=10)
-        
-        # Title
-        if title:
-            title_label = tk.Label(
-                msg_frame,
-                text=title,
-                font=("Segoe UI", 10, "bold"),
-                bg=bg_color,
-                fg=fg_color,
-                anchor="w"
-            )
-            title_label.pack(fill="x")
-        
-        # Message
-        msg_label = tk.Label(
-            msg_frame,
-            text=message,
-            font=("Segoe UI", 9),
-            bg=bg_color,
-            fg=fg_color,
-            anchor="w",
-            wraplength=300
-        )
-        msg_label.pack(fill="x")
-        
-        # Close button
-        close_btn = tk.Label(
-            toast,
-            text="×",
-            font=("Segoe UI", 16, "bold"),
-            bg=bg_color,
-            fg=fg_color,
-            cursor="hand2"
-        )
-        close_btn.pack(side="right", padx=10)
-        close_btn.bind("<Button-1>", lambda e: self.close_notification(toast))
-        
-        # Position notification
-        self.notifications.append(toast)
-        self.reposition_notifications()
-        
-        # Auto-close after duration
-        if duration > 0:
-            self.master.after(duration, lambda: self.close_notification(toast))
-        
-        # Fade in animation
-        toast.lift()
-        
+        key = (title, message, msg_type)
+
+        # Repeats of a visible message bump its badge and keep it up longer
+        for toast in self.notifications:
+            if toast.key == key:
+                toast.set_count(toast.count + 1)
+                toast.expires_at = self._expiry(duration)
+                return
+        for entry in self._waiting:
+            if entry[0] == key:
+                entry[5] += 1
+                return
+
+        self._waiting.append([key, title, message, msg_type, duration, 1])
+        self._schedule()
+
     def close_notification(self, toast):
         """Close a notification"""
         if toast in self.notifications:
-            self.notifications.remove(toast)
-            toast.destroy()
+            self._release(toast)
+            self._schedule()
+
+    def _release(self, toast):
+        """Hide a visible toast and return it to the pool"""
+        self.notifications.remove(toast)
+        toast.hide()
+        self._pool.append(toast)
+        self._dirty = True
+
+    def _expiry(self, duration):
+        return time.monotonic() + duration / 1000 if duration > 0 else None
+
+    def _schedule(self, delay=None):
+        """Run a pass after delay ms (default: the repaint interval), unless one is already due sooner"""
+        delay = delay or self.repaint_interval
+        due = time.monotonic() + delay / 1000
+        if self._job is not None:
+            if self._job_due <= due:
+                return
+            self.master.after_cancel(self._job)
+        self._job = self.master.after(delay, self._update)
+        self._job_due = due
+
+    def _update(self):
+        """Expire, show waiting messages and reposition, once per interval"""
+        self._job = None
+        now = time.monotonic()
+        for toast in [toast for toast in self.notifications
+                      if toast.expires_at is not None and toast.expires_at <= now]:
+            self._release(toast)
+
+        shown = False
+        while self._waiting and len(self.notifications) < self.max_visible:
+            key, title, message, msg_type, duration, count = self._waiting.popleft()
+            toast = self._pool.pop() if self._pool else _Toast(self.master, self.close_notification)
+            toast.configure(title, message, msg_type)
+            toast.set_count(count)
+            toast.key = key
+            toast.expires_at = self._expiry(duration)
+            self.notifications.append(toast)
+            self._dirty = True
+            shown = True
+
+        if self._dirty:
             self.reposition_notifications()
-    
+        if shown:
+            # Reconfigured toasts are measured by Tk after this pass: lay out once more
+            self._dirty = True
+
+        # Come back next interval for pending work, otherwise at the next expiry
+        if self._waiting or self._dirty:
+            self._schedule()
+        else:
+            expiries = [toast.expires_at for toast in self.notifications if toast.expires_at is not None]
+            if expiries:
+                self._schedule(max(self.repaint_interval, int((min(expiries) - now) * 1000)))
+
     def reposition_notifications(self):
-        """Reposition all notifications"""
+        """Reposition the visible notifications, moving only those whose place changed"""
+        self._dirty = False
         y_offset = 10
         for toast in self.notifications:
-            toast.place(relx=1.0, x=-10, y=y_offset, anchor="ne")
-            y_offset += toast.winfo_reqheight() + 10
-
-
+            if toast.y != y_offset:
+                toast.frame.place(relx=1.0, x=-10, y=y_offset, anchor="ne")
+                toast.frame.lift()
+                toast.y = y_offset
+            height = toast.frame.winfo_reqheight()
+            if height <= 1:
+                # Not measured yet: lay out again on the next pass
+                self._dirty = True
+                height = 60
+            y_offset += height + 10
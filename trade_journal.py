@@ -0,0 +1,278 @@
+"""
+Trade Journal Module
+Append-only SQLite record of every order sent, every status change, every
+execution and its commission, written by a background thread
+
+Recording only snapshots the fields into a tuple and queues it, so the order
+path never waits on the disk. The writer commits whatever has queued up in one
+transaction (WAL mode, fsync per batch), and rows are never updated or deleted.
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+JOURNAL_FILE = "trade_journal.db"
+BATCH_SIZE = 500  # Most rows written in one transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    date TEXT NOT NULL,
+    order_id INTEGER,
+    parent_id INTEGER,
+    order_ref TEXT,
+    symbol TEXT,
+    action TEXT,
+    order_type TEXT,
+    quantity REAL,
+    limit_price REAL,
+    stop_price REAL,
+    tif TEXT,
+    oca_group TEXT,
+    group_type TEXT,
+    details TEXT
+);
+CREATE TABLE IF NOT EXISTS order_events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    date TEXT NOT NULL,
+    order_id INTEGER,
+    perm_id INTEGER,
+    order_ref TEXT,
+    symbol TEXT,
+    status TEXT,
+    filled REAL,
+    remaining REAL,
+    avg_fill_price REAL
+);
+CREATE TABLE IF NOT EXISTS executions (
+    exec_id TEXT PRIMARY KEY,
+    ts REAL NOT NULL,
+    date TEXT NOT NULL,
+    time REAL,
+    order_id INTEGER,
+    perm_id INTEGER,
+    order_ref TEXT,
+    symbol TEXT,
+    side TEXT,
+    shares REAL,
+    price REAL,
+    cum_qty REAL,
+    avg_price REAL,
+    account TEXT,
+    exchange TEXT
+);
+CREATE TABLE IF NOT EXISTS commissions (
+    exec_id TEXT PRIMARY KEY,
+    ts REAL NOT NULL,
+    date TEXT NOT NULL,
+    order_ref TEXT,
+    symbol TEXT,
+    commission REAL,
+    currency TEXT,
+    realized_pnl REAL
+);
+CREATE INDEX IF NOT EXISTS orders_date ON orders (date);
+CREATE INDEX IF NOT EXISTS orders_symbol ON orders (symbol, date);
+CREATE INDEX IF NOT EXISTS orders_ref ON orders (order_ref);
+CREATE INDEX IF NOT EXISTS order_events_date ON order_events (date);
+CREATE INDEX IF NOT EXISTS order_events_symbol ON order_events (symbol, date);
+CREATE INDEX IF NOT EXISTS order_events_ref ON order_events (order_ref);
+CREATE INDEX IF NOT EXISTS executions_date ON executions (date);
+CREATE INDEX IF NOT EXISTS executions_symbol ON executions (symbol, date);
+CREATE INDEX IF NOT EXISTS executions_ref ON executions (order_ref);
+CREATE INDEX IF NOT EXISTS commissions_date ON commissions (date);
+CREATE INDEX IF NOT EXISTS commissions_symbol ON commissions (symbol, date);
+CREATE INDEX IF NOT EXISTS commissions_ref ON commissions (order_ref);
+"""
+
+INSERT_ORDER = """INSERT INTO orders (ts, date, order_id, parent_id, order_ref, symbol, action, order_type,
+    quantity, limit_price, stop_price, tif, oca_group, group_type, details)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+INSERT_EVENT = """INSERT INTO order_events (ts, date, order_id, perm_id, order_ref, symbol, status,
+    filled, remaining, avg_fill_price) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+# Executions and commissions are replayed after a reconnect or sync; the first copy wins
+INSERT_EXECUTION = """INSERT OR IGNORE INTO executions (exec_id, ts, date, time, order_id, perm_id, order_ref,
+    symbol, side, shares, price, cum_qty, avg_price, account, exchange)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+INSERT_COMMISSION = """INSERT OR IGNORE INTO commissions (exec_id, ts, date, order_ref, symbol, commission,
+    currency, realized_pnl) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+
+def _date(ts):
+    """Local calendar date of a timestamp, as indexed"""
+    return time.strftime('%Y-%m-%d', time.localtime(ts))
+
+def _number(value):
+    """Price or amount, or None when unset (ib_insync uses a huge sentinel)"""
+    if value is None or value != value or abs(value) >= 1e300:
+        return None
+    return value
+
+class TradeJournal:
+    """Append-only trade journal with a batching writer thread"""
+
+    def __init__(self, path=JOURNAL_FILE, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.written = 0  # Rows committed
+        self.failed = 0   # Rows lost to write errors
+        self._queue = queue.Queue()
+        self._ib = None
+        with closing(self._connect()) as db:
+            db.executescript(SCHEMA)
+        self._thread = threading.Thread(target=self._writer, name="trade-journal", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")
+        # One fsync per batch keeps every committed row on disk through a power cut
+        db.execute("PRAGMA synchronous=FULL")
+        return db
+
+    def attach(self, ib):
+        """Record status changes, executions and commissions from an IB session"""
+        self._detach()
+        self._ib = ib
+        ib.orderStatusEvent += self.record_status
+        ib.execDetailsEvent += self.record_execution
+        ib.commissionReportEvent += self.record_commission
+
+    def _detach(self):
+        if self._ib is not None:
+            self._ib.orderStatusEvent -= self.record_status
+            self._ib.execDetailsEvent -= self.record_execution
+            self._ib.commissionReportEvent -= self.record_commission
+            self._ib = None
+
+    def record_group(self, staged):
+        """Record every leg of a transmitted StagedOrder"""
+        now = time.time()
+        date = _date(now)
+        details = json.dumps(staged.details, default=str)
+        for order in staged.orders:
+            self._queue.put((INSERT_ORDER, (
+                now, date, order.orderId, order.parentId or None, order.orderRef, staged.ticker,
+                order.action, order.orderType, order.totalQuantity, _number(order.lmtPrice),
+                _number(order.auxPrice), order.tif, order.ocaGroup or None, staged.order_type, details
+            )))
+
+    def record_status(self, trade):
+        """Record an order status change (orderStatusEvent handler)"""
+        now = time.time()
+        status = trade.orderStatus
+        self._queue.put((INSERT_EVENT, (
+            now, _date(now), trade.order.orderId, trade.order.permId, trade.order.orderRef,
+            trade.contract.symbol, status.status, status.filled, status.remaining, status.avgFillPrice
+        )))
+
+    def record_execution(self, trade, fill):
+        """Record an execution (execDetailsEvent handler; trade may be None)"""
+        execution = fill.execution
+        executed = execution.time.timestamp()
+        self._queue.put((INSERT_EXECUTION, (
+            execution.execId, time.time(), _date(executed), executed, execution.orderId,
+            execution.permId, execution.orderRef, fill.contract.symbol, execution.side,
+            execution.shares, execution.price, execution.cumQty, execution.avgPrice,
+            execution.acctNumber, execution.exchange
+        )))
+
+    def record_commission(self, trade, fill, report):
+        """Record an execution's commission (commissionReportEvent handler; trade may be None)"""
+        execution = fill.execution
+        self._queue.put((INSERT_COMMISSION, (
+            report.execId, time.time(), _date(execution.time.timestamp()), execution.orderRef,
+            fill.contract.symbol, _number(report.commission), report.currency, _number(report.realizedPNL)
+        )))
+
+    def flush(self, timeout=5):
+        """
+        Wait until everything recorded so far is committed
+        Returns: True if the writer caught up within timeout seconds
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5):
+        """Commit what is queued and stop the writer"""
+        self._detach()
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _writer(self):
+        """Commit queued rows in batches until closed"""
+        db = self._connect()
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = [item for item in batch if isinstance(item, tuple)]
+            if rows:
+                try:
+                    with db:
+                        for sql, params in rows:
+                            db.execute(sql, params)
+                    self.written += len(rows)
+                except sqlite3.Error as e:
+                    self.failed += len(rows)
+                    print(f"Error writing trade journal: {e}")
+
+            for item in batch:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    item.set()
+        db.close()
+
+    def orders(self, date=None, symbol=None, order_ref=None):
+        """
+        Orders sent, oldest first
+        Returns: list of dicts
+        """
+        return self._query("orders", date, symbol, order_ref)
+
+    def order_events(self, date=None, symbol=None, order_ref=None):
+        """
+        Order status changes, oldest first
+        Returns: list of dicts
+        """
+        return self._query("order_events", date, symbol, order_ref)
+
+    def executions(self, date=None, symbol=None, order_ref=None):
+        """
+        Executions, oldest first
+        Returns: list of dicts
+        """
+        return self._query("executions", date, symbol, order_ref)
+
+    def commissions(self, date=None, symbol=None, order_ref=None):
+        """
+        Commission reports, oldest first
+        Returns: list of dicts
+        """
+        return self._query("commissions", date, symbol, order_ref)
+
+    def _query(self, table, date, symbol, order_ref):
+        """Indexed lookup by any combination of date ('YYYY-MM-DD' or datetime.date), symbol and order ref"""
+        clauses = []
+        params = []
+        for column, value in (("date", date), ("symbol", symbol), ("order_ref", order_ref)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(str(value).upper() if column == "symbol" else str(value))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with closing(sqlite3.connect(self.path)) as db:
+            db.row_factory = sqlite3.Row
+            rows = db.execute(f"SELECT * FROM {table}{where} ORDER BY rowid", params).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,300 @@
+"""
+Web Server Module
+Asyncio HTTP backend for templates/index.html, serving the page, mapping
+/connect and /execute_trade onto one shared IBConnector and streaming live
+updates over the /ws WebSocket
+
+The server runs on the connector's IB loop thread, so request handlers await
+the connector directly and concurrent orders never wait on each other.
+
+Usage:
+    python web_server.py [--host 127.0.0.1] [--port 8080] [--allow-host NAME ...] [--simulate]
+"""
+import argparse
+import asyncio
+import json
+import os
+from config import load_config
+from ib_connector import connector_from_config
+from connection_supervisor import ConnectionSupervisor
+from live_stream import LiveStream
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+MAX_BODY = 64 * 1024
+
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "[::1]")
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 415: "Unsupported Media Type", 426: "Upgrade Required",
+               500: "Internal Server Error"}
+
+class HTTPError(Exception):
+    """Error response with a status code"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class WebServer:
+    """Minimal keep-alive HTTP/1.1 server for the web trading terminal"""
+
+    def __init__(self, ib_connector, supervisor, host="127.0.0.1", port=8080,
+                 order_type="Market + 3 Stops", ack_timeout=5, allowed_hosts=()):
+        self.ib = ib_connector
+        self.supervisor = supervisor
+        self.host = host
+        self.port = port
+        self.allowed_hosts = tuple(allowed_hosts)  # Extra names/addresses the page may be loaded from
+        self.order_type = order_type    # What the page's "Buy + Stops" button sends
+        self.ack_timeout = ack_timeout  # Seconds to wait for TWS to acknowledge an order
+        self.server = None
+        self._supervising = False
+        self._page = None
+        self.stream = LiveStream(ib_connector)  # Quotes, account values, orders and fills for /ws
+        self.routes = {
+            ("GET", "/"): self._index,
+            ("GET", "/index.html"): self._index,
+            ("POST", "/connect"): self._connect,
+            ("POST", "/execute_trade"): self._execute_trade
+        }
+
+    async def start(self):
+        """Start listening (IB loop thread)"""
+        self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.stream.start()
+        print(f"Web terminal on http://{self.host}:{self.port}/")
+        if self.host in ("", "0.0.0.0", "::") and not self.allowed_hosts:
+            print("Listening on every interface, but only localhost names are accepted; "
+                  "add --allow-host for the names other machines use")
+
+    async def serve_forever(self):
+        """Start and serve until cancelled"""
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _handle_client(self, reader, writer):
+        """Serve requests on one connection until the client closes it"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if path == "/ws":
+                    # The connection becomes a WebSocket until the page goes away
+                    await self.stream.serve(reader, writer, self._websocket_key(method, headers))
+                    break
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, content_type, payload = await self._dispatch(method, path, headers, body)
+                self._write_response(writer, status, content_type, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HTTPError as e:
+            self._write_response(writer, e.status, "application/json",
+                                 json.dumps({"error": str(e)}).encode(), False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """
+        Read one HTTP request
+        Returns: (method, path, headers, body) or None at end of stream
+        """
+        request_line = await self._read_line(reader)
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await self._read_line(reader)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def _read_line(self, reader):
+        """One CRLF-terminated line (raises HTTPError past the stream's line limit)"""
+        try:
+            return await reader.readline()
+        except ValueError:
+            # readline turns LimitOverrunError into ValueError once a line outgrows the buffer
+            raise HTTPError(400, "Request line or header too long")
+
+    def _websocket_key(self, method, headers):
+        """
+        Check a WebSocket upgrade request
+        Returns: the Sec-WebSocket-Key header
+        """
+        if method != "GET":
+            raise HTTPError(405, STATUS_TEXT[405])
+        # Browsers let any page open a WebSocket anywhere: only this server's page may read the stream
+        self._check_origin(headers)
+        key = headers.get("sec-websocket-key")
+        if "websocket" not in headers.get("upgrade", "").lower() or not key:
+            raise HTTPError(426, "WebSocket upgrade required")
+        return key
+
+    def _check_origin(self, headers):
+        """
+        Refuse requests a browser sends on behalf of another site (and DNS-rebound
+        host names): Host must name this server, and Origin, when sent, must match it
+        Listening on every interface, only localhost names and allowed_hosts are accepted
+        """
+        host = headers.get("host", "")
+        names = LOCAL_HOSTS + self.allowed_hosts
+        if self.host not in ("", "0.0.0.0", "::"):
+            names = (self.host,) + names
+        allowed = {f"{name}:{self.port}" for name in names}
+        if host not in allowed:
+            raise HTTPError(403, "Unexpected Host header")
+        origin = headers.get("origin")
+        if origin is not None and origin not in {f"http://{name}" for name in allowed}:
+            raise HTTPError(403, "Cross-origin requests are not allowed")
+
+    async def _dispatch(self, method, path, headers, body):
+        """
+        Route a request
+        Returns: (status, content type, payload bytes)
+        """
+        handler = self.routes.get((method, path))
+        if handler is None:
+            status = 405 if any(route_path == path for _, route_path in self.routes) else 404
+            return status, "application/json", json.dumps({"error": STATUS_TEXT[status]}).encode()
+        try:
+            if method == "POST":
+                # Only same-origin JSON: a cross-site form or text/plain "simple" request
+                # must never reach an order handler
+                self._check_origin(headers)
+                if headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+                    raise HTTPError(415, "Content-Type must be application/json")
+            return await handler(body)
+        except HTTPError as e:
+            return e.status, "application/json", json.dumps({"error": str(e)}).encode()
+        except Exception as e:
+            print(f"Error handling {method} {path}: {e}")
+            return 500, "application/json", json.dumps({"error": str(e)}).encode()
+
+    def _write_response(self, writer, status, content_type, payload, keep_alive):
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Cache-Control: no-store\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + payload)
+
+    def _json(self, data):
+        return 200, "application/json", json.dumps(data).encode()
+
+    async def _index(self, body):
+        """The web terminal page (read once)"""
+        if self._page is None:
+            with open(os.path.join(TEMPLATE_DIR, "index.html"), "rb") as f:
+                self._page = f.read()
+        return 200, "text/html; charset=utf-8", self._page
+
+    async def _connect(self, body):
+        """Start the shared connection on first use; report whether it is up"""
+        if self.ib.is_connected():
+            return self._json({"status": "connected"})
+        if not self._supervising:
+            self._supervising = True
+            self.supervisor.start()
+        return self._json({"status": "connecting"})
+
+    async def _execute_trade(self, body):
+        """Buy with the page's quantity and stop; answers once TWS acknowledges the entry"""
+        try:
+            request = json.loads(body or b"{}")
+            ticker = str(request["ticker"]).strip().upper()
+            qty = int(request["quantity"])
+            stop_price = float(request["stopPrice"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPError(400, "ticker, quantity and stopPrice are required")
+        if not ticker or qty <= 0:
+            raise HTTPError(400, "Invalid ticker or quantity")
+        if not self.ib.is_connected():
+            return self._json({"error": "Not connected to IB Gateway"})
+
+        # Market entries are priced off the live quote; it also anchors the stop ladder.
+        # Pinned rather than made active, so concurrent orders keep their own quotes
+        try:
+            price = await self.ib.pin_quote_async(ticker)
+        except ValueError as e:
+            return self._json({"error": str(e)})
+        try:
+            if not price:
+                return self._json({"error": f"No market data for {ticker}"})
+            if stop_price >= price:
+                return self._json({"error": f"Stop ${stop_price:.2f} must be below the price ${price:.2f}"})
+
+            timeline = self.ib.latency.start(self.order_type, ticker)
+            result = await self.ib.place_order_async(
+                ticker, qty, stop_price, price, "BUY", self.order_type,
+                timeline=timeline, ack_timeout=self.ack_timeout
+            )
+        except ValueError as e:
+            return self._json({"error": str(e)})
+        finally:
+            self.ib.unpin_quote(ticker)
+        return self._json({
+            "orderId": result["orderId"],
+            "status": result["status"],
+            "avgPrice": (result["avgFillPrice"] if result["avgFillPrice"] is not None
+                         else f"pending ({result['status']})"),
+            "stopPrices": result["stop_prices"],
+            "quantities": result["quantities"]
+        })
+
+def main():
+    """Run the web terminal backend"""
+    parser = argparse.ArgumentParser(description="IB Order Panel web terminal")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="HTTP port")
+    parser.add_argument("--allow-host", action="append", default=[], metavar="NAME",
+                        help="Extra host name or address the page is opened with (repeatable; "
+                             "needed when listening on 0.0.0.0)")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Run against the in-process simulated gateway instead of TWS/IB Gateway")
+    args = parser.parse_args()
+
+    config = load_config()
+    ib_factory = None
+    if args.simulate:
+        from sim_gateway import SimulatedGateway
+        ib_factory = SimulatedGateway().create_ib
+        print("Running against the simulated gateway")
+    ib_connector = connector_from_config(config, ib_factory)
+    supervisor = ConnectionSupervisor(ib_connector, int(config.get("port", "4001")))
+    server = WebServer(ib_connector, supervisor, args.host, args.port, allowed_hosts=args.allow_host)
+
+    try:
+        ib_connector.loop_thread.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+        ib_connector.disconnect()
+        if ib_connector.journal is not None:
+            ib_connector.journal.close()
+
+if __name__ == "__main__":
+    main()